@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Change Journal - Append-only NDJSON log of tracked file changes.
+
+track_changes appends one line per Write/Edit with a single O_APPEND
+write, so recording a change costs the same however long the history is
+and concurrent hooks never lose entries. The active segment is rotated to
+`changes.ndjson.1`, `.2`, ... once it passes SEGMENT_BYTES, keeping
+MAX_SEGMENTS old segments. Recent changes are read by seeking backwards
+from the end of the newest segments.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterator
+
+from state_store import file_lock
+
+STATE_DIR = Path.home() / ".dartai"
+JOURNAL_DIR = STATE_DIR / "changes"
+JOURNAL_FILE = JOURNAL_DIR / "changes.ndjson"
+# Single JSON document written by track_changes before the journal existed
+LEGACY_FILE = STATE_DIR / "tracked_changes.json"
+
+SEGMENT_BYTES = 1024 * 1024
+MAX_SEGMENTS = 5
+# Longer strings in hook input (e.g. whole files passed to Write) are elided
+MAX_VALUE_CHARS = 500
+READ_BLOCK_BYTES = 64 * 1024
+
+
+def segment_path(index: int) -> Path:
+    """Get a journal segment; 0 is the active one, higher is older."""
+    return JOURNAL_FILE if index == 0 else JOURNAL_FILE.with_name(f"{JOURNAL_FILE.name}.{index}")
+
+
+def compact(value):
+    """Shrink hook input for the journal by eliding long strings."""
+    if isinstance(value, str) and len(value) > MAX_VALUE_CHARS:
+        return f"<{len(value)} chars>"
+    if isinstance(value, dict):
+        return {k: compact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    return value
+
+
+def rotate():
+    """Shift segments down one and start a new active segment."""
+    with file_lock(JOURNAL_FILE):
+        try:
+            if JOURNAL_FILE.stat().st_size < SEGMENT_BYTES:
+                return  # another hook rotated first
+        except FileNotFoundError:
+            return
+        try:
+            segment_path(MAX_SEGMENTS).unlink()
+        except FileNotFoundError:
+            pass
+        for index in range(MAX_SEGMENTS - 1, -1, -1):
+            try:
+                os.replace(segment_path(index), segment_path(index + 1))
+            except FileNotFoundError:
+                pass
+
+
+def append(entry: dict):
+    """Append one change as a single line, rotating when the segment is full."""
+    JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(entry, separators=(",", ":"), default=str) + "\n").encode()
+    fd = os.open(JOURNAL_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size >= SEGMENT_BYTES:
+        rotate()
+
+
+def read_lines_reversed(path: Path) -> Iterator[bytes]:
+    """Yield a file's lines last to first, reading blocks backwards from the end."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            step = min(READ_BLOCK_BYTES, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if remainder:
+            yield remainder
+
+
+def iter_changes_reversed() -> Iterator[dict]:
+    """Yield changes newest first across all segments, skipping torn lines."""
+    for index in range(MAX_SEGMENTS + 1):
+        for line in read_lines_reversed(segment_path(index)):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def tail(count: int = 100) -> list:
+    """Get the last count changes, oldest first."""
+    changes = []
+    for change in iter_changes_reversed():
+        if len(changes) >= count:
+            break
+        changes.append(change)
+    changes.reverse()
+    return changes
+
+
+def iter_changes() -> Iterator[dict]:
+    """Yield every journaled change, oldest first."""
+    for index in range(MAX_SEGMENTS, -1, -1):
+        try:
+            with open(segment_path(index)) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def migrate_legacy() -> int:
+    """Move changes from tracked_changes.json into the journal; returns how many."""
+    if not LEGACY_FILE.exists():
+        return 0
+    with file_lock(LEGACY_FILE):
+        try:
+            changes = json.loads(LEGACY_FILE.read_text()).get("changes", [])
+        except (OSError, ValueError):
+            return 0
+        for change in changes:
+            append({**change, "info": compact(change.get("info", {}))})
+        LEGACY_FILE.unlink()
+    return len(changes)
+
+
+def stats() -> dict:
+    """Describe the journal's segments."""
+    segments = []
+    for index in range(MAX_SEGMENTS + 1):
+        try:
+            segments.append({"path": str(segment_path(index)), "bytes": segment_path(index).stat().st_size})
+        except FileNotFoundError:
+            continue
+    return {"success": True, "segments": segments, "total_bytes": sum(s["bytes"] for s in segments)}
+
+
+def main():
+    """CLI interface for reading the change journal."""
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage: change_journal.py <command> [args]",
+            "commands": ["tail [N]", "stats", "migrate"]
+        }))
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    try:
+        if command == "tail":
+            count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+            changes = tail(count)
+            result = {"success": True, "count": len(changes), "changes": changes}
+        elif command == "stats":
+            result = stats()
+        elif command == "migrate":
+            result = {"success": True, "migrated": migrate_legacy()}
+        else:
+            result = {"error": f"Unknown command: {command}"}
+        print(json.dumps(result, indent=2))
+
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
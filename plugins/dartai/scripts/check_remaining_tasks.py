@@ -12,27 +12,10 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+from project_config import read_config
+
 STATE_DIR = Path.home() / ".dartai"
 LOOP_FILE = Path(".claude/dartai-loop-state.json")
-CONFIG_FILE = Path(".claude/dartai.local.md")
-
-
-def parse_config():
-    """Parse the dartai config file for dartboard settings."""
-    if not CONFIG_FILE.exists():
-        return {}
-
-    text = CONFIG_FILE.read_text()
-
-    if text.startswith("---"):
-        parts = text.split("---", 2)
-        if len(parts) >= 3:
-            try:
-                import yaml
-                return yaml.safe_load(parts[1]) or {}
-            except Exception:
-                pass
-    return {}
 
 
 def check_active_loop():
@@ -67,7 +50,7 @@ def get_active_dartboard():
             pass
 
     # Fall back to config
-    config = parse_config()
+    config = read_config()["frontmatter"]
     return config.get("last_dartboard") or config.get("default_dartboard")
 
 
@@ -9,11 +9,12 @@ potential issues, patterns, and improvement opportunities.
 import json
 import os
 import re
-import subprocess
 import sys
 from pathlib import Path
 from typing import Optional
 
+from git_access import get_repo, get_stats
+
 
 # Patterns to check for
 REVIEW_PATTERNS = {
@@ -270,19 +271,12 @@ def review_directory(dir_path: Path, checks: Optional[list] = None,
 def get_changed_files(project_dir: Path) -> list:
     """Get list of changed files from git."""
     try:
-        # Get staged and unstaged changes
-        result = subprocess.run(
-            ["git", "diff", "--name-only", "HEAD"],
-            cwd=project_dir,
-            capture_output=True,
-            text=True
-        )
-
-        if result.returncode != 0:
+        repo = get_repo(project_dir)
+        if repo is None:
             return []
 
-        files = result.stdout.strip().split("\n")
-        return [f for f in files if f]
+        # Get staged and unstaged changes
+        return repo.changed_files("HEAD", cwd=project_dir)
 
     except Exception:
         return []
@@ -332,6 +326,7 @@ def review_changes(project_dir: str, checks: Optional[list] = None) -> dict:
             for key in ["errors", "warnings", "info"]:
                 results["total_issues"][key] += file_result["summary"][key]
 
+    results["git_stats"] = get_stats()
     return results
 
 
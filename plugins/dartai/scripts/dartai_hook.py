@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+dartai Hook - Single entry point for every dartai hook.
+
+hooks.json runs `python3 -S dartai_hook.py <event>`. Only the handler
+for the event is imported, and hooks start with nothing but the standard
+library; project_config adds site-packages itself in the rare case config
+frontmatter needs PyYAML.
+
+`dartai_hook.py bench [--budget-ms=N]` runs every hook the way hooks.json
+does, in a scratch HOME and project, and fails when one exceeds the budget.
+"""
+
+import json
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# event -> (module, function)
+HANDLERS = {
+    "session-start": ("session_init", "init_session"),
+    "session-end": ("session_cleanup", "cleanup_session"),
+    "spawn": ("track_subagent_spawn", "track_spawn"),
+    "task-update": ("on_task_update", "on_task_update"),
+    "dartboard": ("track_dartboard", "main"),
+    "change": ("track_changes", "track_change"),
+    "iteration": ("track_iteration", "track_iteration"),
+    "verification": ("track_verification", "track_verification"),
+    "docs": ("track_docs", "track_docs")
+}
+
+# Per-hook wall-clock budget for `bench`, in milliseconds
+DEFAULT_BUDGET_MS = 250
+
+# Sample stdin for `bench`, shaped like Claude Code hook input
+BENCH_INPUT = {
+    "task-update": {"tool_name": "mcp__dart-query__update_task",
+                    "tool_input": {"id": "bench", "status": "Done"}},
+    "dartboard": {"tool_name": "mcp__dart-query__list_tasks",
+                  "tool_input": {"dartboard": "Bench/Board"}},
+    "change": {"tool_name": "Edit", "tool_input": {"file_path": "bench.py"}}
+}
+
+
+def run_hook(event: str):
+    """Import the event's handler, run it and print its result."""
+    module_name, function_name = HANDLERS[event]
+    if SCRIPTS_DIR not in sys.path:
+        # Not on sys.path when run through runpy or an embedding interpreter
+        sys.path.insert(0, SCRIPTS_DIR)
+
+    module = __import__(module_name)
+    result = getattr(module, function_name)()
+    # Handlers such as track_dartboard.main print their own output
+    if result is not None:
+        print(json.dumps(result))
+
+
+def bench(budget_ms: int = DEFAULT_BUDGET_MS) -> dict:
+    """Time every hook in a scratch HOME and project against a budget."""
+    import subprocess
+    import tempfile
+    import time
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        env = {**os.environ, "HOME": os.path.join(scratch, "home")}
+        project = os.path.join(scratch, "project")
+        os.makedirs(os.path.join(project, ".claude"))
+
+        for event in HANDLERS:
+            started = time.monotonic()
+            proc = subprocess.run(
+                [sys.executable, "-S", os.path.abspath(__file__), event],
+                input=json.dumps(BENCH_INPUT.get(event, {})),
+                cwd=project, env=env, capture_output=True, text=True
+            )
+            elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+            results[event] = {
+                "ms": elapsed_ms,
+                "ok": proc.returncode == 0 and elapsed_ms <= budget_ms,
+                **({"stderr": proc.stderr.strip()[-500:]} if proc.returncode else {})
+            }
+
+    over = [event for event, r in results.items() if not r["ok"]]
+    return {"success": not over, "budget_ms": budget_ms, "failed": over, "hooks": results}
+
+
+def main():
+    """Dispatch a hook event, or benchmark all of them."""
+    if len(sys.argv) < 2 or (sys.argv[1] not in HANDLERS and sys.argv[1] != "bench"):
+        print(json.dumps({
+            "error": "Usage: dartai_hook.py <event> | bench [--budget-ms=N]",
+            "events": list(HANDLERS)
+        }))
+        sys.exit(1)
+
+    if sys.argv[1] == "bench":
+        budget = next((int(a.split("=", 1)[1]) for a in sys.argv[2:] if a.startswith("--budget-ms=")),
+                      DEFAULT_BUDGET_MS)
+        result = bench(budget)
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["success"] else 1)
+
+    run_hook(sys.argv[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,6 @@ comments based on code changes.
 """
 
 import json
-import os
 import re
 import subprocess
 import sys
@@ -15,60 +14,74 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from git_access import get_repo, get_stats
+from state_store import file_lock, write_atomic
+
+DART_ID_RE = re.compile(r"\[DART-([^\]]+)\]")
+
+# Commit references to Dart tasks, e.g. "DART-abc123" or "[DART-abc123]"
+DART_REF_RE = re.compile(r"\bDART-([A-Za-z0-9]+)")
+
+# Persistent task -> commits index, relative to the project directory
+COMMIT_INDEX_FILE = Path(".claude") / "dartai-commit-index.json"
+
+
+def net_file_changes(commits) -> dict:
+    """
+    Fold per-commit file changes into net added/modified/deleted lists.
+
+    commits is any iterable, newest first, and is consumed one commit at a
+    time so a streaming git log never has to be held in memory.
+    """
+    oldest_status = {}
+    newest_status = {}
+
+    for commit in commits:
+        for change in commit["files"]:
+            events = [(change["path"], "A" if change["status"] in "RC" else change["status"])]
+            if change["status"] == "R":
+                events.append((change["old_path"], "D"))
+            for path, status in events:
+                newest_status.setdefault(path, status)
+                oldest_status[path] = status
+
+    files = {"added": [], "modified": [], "deleted": []}
+    for path in sorted(newest_status):
+        first, last = oldest_status[path], newest_status[path]
+        if first == "A" and last == "D":
+            continue
+        if first == "A":
+            files["added"].append(path)
+        elif last == "D":
+            files["deleted"].append(path)
+        else:
+            files["modified"].append(path)
+
+    return files
+
 
 def get_git_changes(project_dir: Path, since_commit: Optional[str] = None) -> dict:
-    """Get git changes since a commit or recent changes."""
+    """
+    Get git changes since a commit, or over the last 10 commits.
+
+    Returns {"commits": [{"hash", "message"}], "files": {...}}. File lists
+    are folded from the streaming log, so only the one-line commit
+    summaries grow with the size of the range.
+    """
     try:
-        # Get recent commits
-        if since_commit:
-            cmd = ["git", "log", f"{since_commit}..HEAD", "--oneline"]
-        else:
-            cmd = ["git", "log", "-10", "--oneline"]
+        rev_args = [f"{since_commit}..HEAD"] if since_commit else ["-10"]
+        commits = []
 
-        result = subprocess.run(
-            cmd,
-            cwd=project_dir,
-            capture_output=True,
-            text=True
-        )
+        def summarized(stream):
+            for commit in stream:
+                commits.append({"hash": commit["hash"], "message": commit["message"]})
+                yield commit
 
-        commits = []
-        if result.returncode == 0:
-            for line in result.stdout.strip().split("\n"):
-                if line:
-                    parts = line.split(" ", 1)
-                    commits.append({
-                        "hash": parts[0],
-                        "message": parts[1] if len(parts) > 1 else ""
-                    })
-
-        # Get changed files
-        if since_commit:
-            cmd = ["git", "diff", "--name-status", since_commit, "HEAD"]
-        else:
-            cmd = ["git", "diff", "--name-status", "HEAD~10", "HEAD"]
-
-        result = subprocess.run(
-            cmd,
-            cwd=project_dir,
-            capture_output=True,
-            text=True
-        )
-
-        files = {"added": [], "modified": [], "deleted": []}
-        if result.returncode == 0:
-            for line in result.stdout.strip().split("\n"):
-                if line:
-                    parts = line.split("\t")
-                    status = parts[0]
-                    file_name = parts[1] if len(parts) > 1 else ""
-
-                    if status.startswith("A"):
-                        files["added"].append(file_name)
-                    elif status.startswith("M"):
-                        files["modified"].append(file_name)
-                    elif status.startswith("D"):
-                        files["deleted"].append(file_name)
+        repo = get_repo(project_dir)
+        try:
+            files = net_file_changes(summarized(repo.iter_log(rev_args) if repo else []))
+        except subprocess.CalledProcessError:
+            commits, files = [], net_file_changes([])
 
         return {
             "commits": commits,
@@ -79,6 +92,97 @@ def get_git_changes(project_dir: Path, since_commit: Optional[str] = None) -> di
         return {"error": str(e)}
 
 
+def load_commit_index(project_dir: Path) -> dict:
+    """Load the task -> commits index for the project."""
+    index_path = project_dir / COMMIT_INDEX_FILE
+    if index_path.exists():
+        try:
+            with open(index_path) as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {"last_sha": None, "tasks": {}}
+
+
+def update_commit_index(project_dir: Path) -> dict:
+    """
+    Index commits that reference DART-<id> since the last indexed commit.
+
+    Only commits after last_sha are read. If last_sha is no longer an
+    ancestor of HEAD (history was rewritten) the index is rebuilt.
+    """
+    index_path = project_dir / COMMIT_INDEX_FILE
+
+    with file_lock(index_path):
+        index = load_commit_index(project_dir)
+
+        repo = get_repo(project_dir)
+        head_sha = repo.head() if repo else None
+        if not head_sha:
+            return {"index": index, "new_commits": 0, "rebuilt": False}
+
+        if index["last_sha"] == head_sha:
+            return {"index": index, "new_commits": 0, "rebuilt": False}
+
+        rebuilt = False
+        if index["last_sha"]:
+            # A commit pruned after a rewrite is caught by the persistent
+            # cat-file process without spawning merge-base
+            known = repo.object_info(index["last_sha"])
+            if not known or known["type"] != "commit" or repo.run(
+                    ["merge-base", "--is-ancestor", index["last_sha"], head_sha]).returncode != 0:
+                index = {"last_sha": None, "tasks": {}}
+                rebuilt = True
+
+        rev_args = [f"{index['last_sha']}..{head_sha}"] if index["last_sha"] else [head_sha]
+
+        new_commits = 0
+        # git log is newest first; collect then insert oldest first
+        referenced = []
+        for commit in repo.iter_log(rev_args, include_body=True):
+            new_commits += 1
+            task_ids = set(DART_REF_RE.findall(f"{commit['message']}\n{commit.get('body', '')}"))
+            if task_ids:
+                referenced.append((task_ids, commit))
+
+        for task_ids, commit in reversed(referenced):
+            entry = {k: commit[k] for k in ("sha", "hash", "message", "files")}
+            for task_id in task_ids:
+                index["tasks"].setdefault(task_id, []).append(entry)
+
+        index["last_sha"] = head_sha
+        index["updated_at"] = datetime.now().isoformat()
+
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(index_path, json.dumps(index))
+
+    return {"index": index, "new_commits": new_commits, "rebuilt": rebuilt}
+
+
+def get_task_changes(project_dir: Path, task_id: str, since_commit: Optional[str] = None,
+                     index: Optional[dict] = None) -> dict:
+    """
+    Get the changes that belong to a task.
+
+    Without since_commit, commits referencing DART-<task_id> are looked up
+    in the commit index; if none are indexed this falls back to the recent
+    history from get_git_changes.
+    """
+    if not since_commit:
+        if index is None:
+            index = update_commit_index(project_dir)["index"]
+        # Index entries are oldest first; net_file_changes expects newest first
+        commits = list(reversed(index["tasks"].get(str(task_id), [])))
+        if commits:
+            return {
+                "commits": commits,
+                "files": net_file_changes(commits),
+                "source": "index"
+            }
+
+    return get_git_changes(project_dir, since_commit)
+
+
 def classify_change(commits: list, files: dict) -> str:
     """Classify the type of change based on commits and files."""
     # Check commit messages for clues
@@ -160,9 +264,20 @@ def generate_failure_comment(task_id: str, issue: str,
 
 
 def update_changelog(project_dir: Path, entries: list) -> dict:
-    """Update the CHANGELOG.md file."""
+    """
+    Update the CHANGELOG.md file.
+
+    The file is rewritten atomically under a lock, and entries whose
+    DART id already appears in the changelog are skipped.
+    """
     changelog_path = project_dir / "CHANGELOG.md"
 
+    with file_lock(changelog_path):
+        return _update_changelog_locked(changelog_path, entries)
+
+
+def _update_changelog_locked(changelog_path: Path, entries: list) -> dict:
+    """Apply changelog entries; the caller holds the changelog lock."""
     # Create if doesn't exist
     if not changelog_path.exists():
         initial_content = f"""# Changelog
@@ -175,13 +290,33 @@ and this project adheres to [Semantic Versioning](https://semver.org/spec/v2.0.0
 ## [Unreleased]
 
 """
-        changelog_path.write_text(initial_content)
+        write_atomic(changelog_path, initial_content)
 
     content = changelog_path.read_text()
 
+    # Skip entries for DART ids that are already documented
+    known_ids = set(DART_ID_RE.findall(content))
+    new_entries_list = []
+    skipped = 0
+    for entry in entries:
+        entry_ids = set(DART_ID_RE.findall(entry.get("text", "")))
+        if entry_ids and entry_ids <= known_ids:
+            skipped += 1
+            continue
+        known_ids |= entry_ids
+        new_entries_list.append(entry)
+
+    if not new_entries_list:
+        return {
+            "success": True,
+            "path": str(changelog_path),
+            "entries_added": 0,
+            "entries_skipped": skipped
+        }
+
     # Group entries by type
     grouped = {}
-    for entry in entries:
+    for entry in new_entries_list:
         change_type = entry.get("type", "Changed")
         if change_type not in grouped:
             grouped[change_type] = []
@@ -228,12 +363,13 @@ and this project adheres to [Semantic Versioning](https://semver.org/spec/v2.0.0
     else:
         new_content = content[:insert_pos] + new_entries + "\n" + content[next_section:]
 
-    changelog_path.write_text(new_content)
+    write_atomic(changelog_path, new_content)
 
     return {
         "success": True,
         "path": str(changelog_path),
-        "entries_added": len(entries)
+        "entries_added": len(new_entries_list),
+        "entries_skipped": skipped
     }
 
 
@@ -246,7 +382,7 @@ def generate_docs(project_dir: str, task_id: str, task_title: str,
         return {"error": f"Project directory not found: {project_dir}"}
 
     # Get changes
-    changes = get_git_changes(project_path, since_commit)
+    changes = get_task_changes(project_path, task_id, since_commit)
 
     if "error" in changes:
         return changes
@@ -281,16 +417,88 @@ def generate_docs(project_dir: str, task_id: str, task_title: str,
         "change_type": change_type,
         "changelog": changelog_result,
         "dart_comment": dart_comment,
-        "files_changed": changes.get("files", {})
+        "files_changed": changes.get("files", {}),
+        "git_stats": get_stats()
     }
 
 
+def generate_batch_docs(project_dir: str, records: list) -> dict:
+    """
+    Generate documentation for many completed tasks in one pass.
+
+    Each record has id, title, summary and optionally since_commit. Records
+    are deduplicated by DART id (the last one wins), git history is read
+    once per distinct since_commit, and all changelog entries are applied
+    in a single atomic CHANGELOG.md rewrite.
+    """
+    project_path = Path(project_dir)
+
+    if not project_path.exists():
+        return {"error": f"Project directory not found: {project_dir}"}
+
+    by_id = {}
+    for record in records:
+        if record.get("id"):
+            by_id[str(record["id"])] = record
+
+    changes_cache = {}
+    index = update_commit_index(project_path)["index"]
+    tasks = []
+    changelog_entries = []
+    errors = []
+
+    for task_id, record in by_id.items():
+        since_commit = record.get("since_commit")
+        if not since_commit and task_id in index["tasks"]:
+            changes = get_task_changes(project_path, task_id, index=index)
+        else:
+            if since_commit not in changes_cache:
+                changes_cache[since_commit] = get_git_changes(project_path, since_commit)
+            changes = changes_cache[since_commit]
+
+        if "error" in changes:
+            errors.append({"task_id": task_id, "error": changes["error"]})
+            continue
+
+        summary = record.get("summary") or record.get("title", "")
+        change_type = classify_change(changes.get("commits", []), changes.get("files", {}))
+
+        changelog_entries.append({
+            "type": change_type,
+            "text": generate_changelog_entry(task_id, record.get("title", ""), change_type, summary)
+        })
+        tasks.append({
+            "task_id": task_id,
+            "change_type": change_type,
+            "dart_comment": generate_completion_comment(
+                task_id, summary, changes.get("files", {}), tests_passed=True
+            ),
+            "files_changed": changes.get("files", {})
+        })
+
+    changelog_result = update_changelog(project_path, changelog_entries) if changelog_entries else None
+
+    return {
+        "success": not errors,
+        "records_read": len(records),
+        "tasks": tasks,
+        "changelog": changelog_result,
+        "errors": errors,
+        "git_stats": get_stats()
+    }
+
+
+def read_ndjson(source) -> list:
+    """Read NDJSON records from a file object, skipping blank lines."""
+    return [json.loads(line) for line in source if line.strip()]
+
+
 def main():
     """CLI interface for doc generator."""
     if len(sys.argv) < 2:
         print(json.dumps({
             "error": "Usage: doc_generator.py <command> [args...]",
-            "commands": ["generate", "changelog", "comment", "failure"]
+            "commands": ["generate", "changelog", "comment", "failure", "batch", "index", "task-changes"]
         }))
         sys.exit(1)
 
@@ -358,6 +566,54 @@ def main():
                 "comment": generate_failure_comment(task_id, issue, step_failed, error)
             }
 
+        elif command == "batch":
+            if len(sys.argv) < 3:
+                print(json.dumps({
+                    "error": "Usage: doc_generator.py batch <project_dir> [records.ndjson|-]"
+                }))
+                sys.exit(1)
+
+            project_dir = sys.argv[2]
+            source = sys.argv[3] if len(sys.argv) > 3 else "-"
+
+            if source == "-":
+                records = read_ndjson(sys.stdin)
+            else:
+                with open(source) as f:
+                    records = read_ndjson(f)
+
+            result = generate_batch_docs(project_dir, records)
+
+        elif command == "index":
+            if len(sys.argv) < 3:
+                print(json.dumps({
+                    "error": "Usage: doc_generator.py index <project_dir>"
+                }))
+                sys.exit(1)
+
+            update = update_commit_index(Path(sys.argv[2]))
+            result = {
+                "success": True,
+                "last_sha": update["index"]["last_sha"],
+                "tasks_indexed": len(update["index"]["tasks"]),
+                "new_commits": update["new_commits"],
+                "rebuilt": update["rebuilt"],
+                "git_stats": get_stats()
+            }
+
+        elif command == "task-changes":
+            if len(sys.argv) < 4:
+                print(json.dumps({
+                    "error": "Usage: doc_generator.py task-changes <project_dir> <task_id> [since_commit]"
+                }))
+                sys.exit(1)
+
+            project_dir = Path(sys.argv[2])
+            task_id = sys.argv[3]
+            since_commit = sys.argv[4] if len(sys.argv) > 4 else None
+
+            result = get_task_changes(project_dir, task_id, since_commit)
+
         else:
             result = {"error": f"Unknown command: {command}"}
 
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Event Store - SQLite telemetry database for dartai hooks.
+
+One WAL-mode database with indexed tables for sessions, task updates,
+subagent spawns, file changes and loop iterations. Hooks record into it
+next to their existing files; the CLI answers queries such as "changes
+for task X" or "iterations in the last hour" from the indexes.
+"""
+
+import json
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import change_journal
+
+STATE_DIR = Path.home() / ".dartai"
+DB_FILE = STATE_DIR / "telemetry.db"
+
+# task_runner snapshot and event log, read to tag changes with the current task
+LOOP_STATE_FILE = STATE_DIR / "loop_state.json"
+LOOP_EVENTS_FILE = STATE_DIR / "loop_events.log"
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    ended_at TEXT,
+    working_dir TEXT,
+    dartboard TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_started_at ON sessions (started_at);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    task_id TEXT,
+    status TEXT,
+    title TEXT,
+    working_dir TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_task_id ON tasks (task_id, ts);
+CREATE INDEX IF NOT EXISTS tasks_ts ON tasks (ts);
+
+CREATE TABLE IF NOT EXISTS spawns (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    subagent_type TEXT,
+    spawn_number INTEGER,
+    working_dir TEXT
+);
+CREATE INDEX IF NOT EXISTS spawns_ts ON spawns (ts);
+
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    task_id TEXT,
+    tool TEXT,
+    path TEXT,
+    working_dir TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_task_id ON changes (task_id, ts);
+CREATE INDEX IF NOT EXISTS changes_path ON changes (path, ts);
+CREATE INDEX IF NOT EXISTS changes_ts ON changes (ts);
+
+CREATE TABLE IF NOT EXISTS iterations (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    iteration INTEGER,
+    task_id TEXT,
+    status TEXT,
+    subagent TEXT,
+    working_dir TEXT
+);
+CREATE INDEX IF NOT EXISTS iterations_ts ON iterations (ts);
+CREATE INDEX IF NOT EXISTS iterations_task_id ON iterations (task_id, ts);
+"""
+
+# Hooks and import_legacy record the same timestamped entries; these keys let
+# an entry land once however often it is imported. Duplicates left by
+# earlier imports are dropped before the keys are added.
+ENTRY_KEYS = {
+    "sessions": "started_at, COALESCE(working_dir, '')",
+    "tasks": "ts, COALESCE(task_id, ''), COALESCE(working_dir, '')",
+    "spawns": "ts, COALESCE(spawn_number, -1)",
+    "changes": "ts, COALESCE(tool, ''), COALESCE(working_dir, '')"
+}
+ENTRY_KEYS_SCHEMA = "".join(
+    f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {key});\n"
+    f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_entry ON {table} ({key});\n"
+    for table, key in ENTRY_KEYS.items()
+)
+
+# Tables the query CLI can list, with the column a task filter applies to
+TABLES = {
+    "sessions": None,
+    "tasks": "task_id",
+    "spawns": None,
+    "changes": "task_id",
+    "iterations": "task_id"
+}
+
+SINCE_RE = re.compile(r"^(\d+)([smhd])$")
+SINCE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+_connection = None
+
+
+def connect() -> sqlite3.Connection:
+    """Open (once per process) the telemetry database in WAL mode."""
+    global _connection
+    if _connection is None:
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_FILE, timeout=5, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.executescript(SCHEMA)
+            conn.executescript(ENTRY_KEYS_SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        _connection = conn
+    return _connection
+
+
+def execute_insert(verb: str, table: str, values: dict) -> Optional[sqlite3.Cursor]:
+    """Run an INSERT variant for one row, or return None on a database error."""
+    if table != "sessions":
+        values.setdefault("ts", datetime.now().isoformat())
+    columns = ", ".join(values)
+    placeholders = ", ".join("?" for _ in values)
+    try:
+        return connect().execute(
+            f"{verb} INTO {table} ({columns}) VALUES ({placeholders})", list(values.values())
+        )
+    except sqlite3.Error:
+        return None
+
+
+def insert(table: str, **values) -> Optional[int]:
+    """
+    Insert one row and return its id.
+
+    Telemetry must never break a hook, so database errors are swallowed
+    and None is returned.
+    """
+    cursor = execute_insert("INSERT", table, values)
+    return cursor.lastrowid if cursor else None
+
+
+def insert_new(table: str, **values) -> bool:
+    """Insert one row unless its entry key is already recorded; returns whether it was."""
+    cursor = execute_insert("INSERT OR IGNORE", table, values)
+    return bool(cursor and cursor.rowcount == 1)
+
+
+def end_session(session_id: int, ended_at: Optional[str] = None):
+    """Mark a recorded session as ended."""
+    try:
+        connect().execute("UPDATE sessions SET ended_at = ? WHERE id = ?",
+                          (ended_at or datetime.now().isoformat(), session_id))
+    except sqlite3.Error:
+        pass
+
+
+def find_value(data, keys: tuple):
+    """Find the first value stored under any of keys in nested hook input."""
+    if isinstance(data, dict):
+        for key in keys:
+            if isinstance(data.get(key), (str, int)):
+                return data[key]
+        for value in data.values():
+            found = find_value(value, keys)
+            if found is not None:
+                return found
+    return None
+
+
+def current_task_id() -> Optional[str]:
+    """
+    Get the task the loop is working on, from the task_runner snapshot and log.
+
+    Only events after the snapshot that start or end a task are replayed, so
+    this stays cheap enough for a per-edit hook.
+    """
+    try:
+        state = json.loads(LOOP_STATE_FILE.read_text())
+    except (OSError, json.JSONDecodeError):
+        state = {}
+    current = (state.get("current_task") or {}).get("id")
+    in_flight = list(state.get("in_flight", {}))
+
+    try:
+        with open(LOOP_EVENTS_FILE) as f:
+            for line in f:
+                if not any(f'"{t}"' in line for t in ("set_task", "complete_task", "lease_expired", "stop")):
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event["seq"] <= state.get("event_seq", 0):
+                    continue
+                if event["type"] == "set_task":
+                    in_flight.append(event["task_id"])
+                elif event["type"] in ("complete_task", "lease_expired") and event["task_id"] in in_flight:
+                    in_flight.remove(event["task_id"])
+                elif event["type"] == "stop":
+                    in_flight = []
+                current = in_flight[-1] if in_flight else None
+    except OSError:
+        pass
+    return current
+
+
+def parse_since(value: str) -> str:
+    """Turn "90m", "1h", "7d" or an ISO timestamp into an ISO lower bound."""
+    match = SINCE_RE.match(value)
+    if match:
+        delta = timedelta(**{SINCE_UNITS[match.group(2)]: int(match.group(1))})
+        return (datetime.now() - delta).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+
+def query(table: str, task_id: Optional[str] = None, since: Optional[str] = None,
+          path: Optional[str] = None, limit: int = 100) -> dict:
+    """List the newest rows of a table, filtered by task, time and path."""
+    if table not in TABLES:
+        return {"success": False, "error": f"Unknown table: {table}", "tables": list(TABLES)}
+
+    time_column = "started_at" if table == "sessions" else "ts"
+    where, params = [], []
+    if task_id:
+        if not TABLES[table]:
+            return {"success": False, "error": f"{table} has no task column"}
+        where.append(f"{TABLES[table]} = ?")
+        params.append(task_id)
+    if since:
+        where.append(f"{time_column} >= ?")
+        params.append(parse_since(since))
+    if path:
+        if table != "changes":
+            return {"success": False, "error": "Only changes can be filtered by path"}
+        where.append("path = ?")
+        params.append(path)
+
+    sql = f"SELECT * FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {time_column} DESC LIMIT ?"
+
+    rows = [dict(row) for row in connect().execute(sql, [*params, limit])]
+    return {
+        "success": True,
+        "table": table,
+        "count": len(rows),
+        "rows": rows
+    }
+
+
+def summary(since: Optional[str] = None) -> dict:
+    """Count rows per table, optionally since a time."""
+    conn = connect()
+    counts = {}
+    for table in TABLES:
+        time_column = "started_at" if table == "sessions" else "ts"
+        if since:
+            counts[table] = conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE {time_column} >= ?", (parse_since(since),)
+            ).fetchone()[0]
+        else:
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return {"success": True, "database": str(DB_FILE), "since": since, "counts": counts}
+
+
+def import_legacy() -> dict:
+    """
+    Backfill the database from the JSON and log files hooks wrote before it existed.
+
+    Entries already recorded, by the hooks or an earlier import, are
+    skipped, so importing again is safe. Counts only rows actually added.
+    """
+    imported = {"tasks": 0, "spawns": 0, "changes": 0, "sessions": 0}
+    conn = connect()
+    conn.execute("BEGIN")
+    try:
+        updates = STATE_DIR / "task_updates.log"
+        if updates.exists():
+            for line in updates.read_text().splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                info = entry.get("task_info", {})
+                tool_input = info.get("tool_input", info)
+                imported["tasks"] += insert_new(
+                    "tasks", ts=entry.get("timestamp"),
+                    task_id=find_value(tool_input, ("id", "task_id", "duid")),
+                    status=find_value(tool_input, ("status",)),
+                    title=find_value(tool_input, ("title",)),
+                    working_dir=entry.get("working_dir"), data=json.dumps(info)
+                )
+
+        spawns = STATE_DIR / "spawns.log"
+        if spawns.exists():
+            for line in spawns.read_text().splitlines():
+                match = re.match(r"^(\S+) - Spawn #(\d+): (.+)$", line.strip())
+                if match:
+                    imported["spawns"] += insert_new("spawns", ts=match.group(1),
+                                                     spawn_number=int(match.group(2)),
+                                                     subagent_type=match.group(3))
+
+        # track_changes records every journaled change here too, so only
+        # the journal's history from before the first recorded change is new
+        change_journal.migrate_legacy()
+        first_recorded = conn.execute("SELECT MIN(ts) FROM changes").fetchone()[0]
+        for change in change_journal.iter_changes():
+            if first_recorded and str(change.get("timestamp")) >= first_recorded:
+                continue
+            info = change.get("info", {})
+            imported["changes"] += insert_new(
+                "changes", ts=change.get("timestamp"), task_id=change.get("task_id"),
+                tool=info.get("tool_name"),
+                path=find_value(info.get("tool_input", {}), ("file_path", "path")),
+                working_dir=change.get("working_dir")
+            )
+
+        history = STATE_DIR / "session_history.json"
+        if history.exists():
+            for session in json.loads(history.read_text()).get("sessions", []):
+                imported["sessions"] += insert_new(
+                    "sessions", started_at=session.get("started_at"), ended_at=session.get("ended_at"),
+                    working_dir=session.get("working_dir"), dartboard=session.get("active_dartboard")
+                )
+
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    return {"success": True, "imported": imported}
+
+
+def main():
+    """CLI interface for querying dartai telemetry."""
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage: event_store.py <table|summary|import> [--task=ID] [--since=1h] [--path=P] [--limit=N]",
+            "tables": list(TABLES)
+        }))
+        sys.exit(1)
+
+    command = sys.argv[1]
+    options = dict(arg[2:].split("=", 1) for arg in sys.argv[2:] if arg.startswith("--") and "=" in arg)
+
+    try:
+        if command == "summary":
+            result = summary(options.get("since"))
+        elif command == "import":
+            result = import_legacy()
+        else:
+            result = query(command, task_id=options.get("task"), since=options.get("since"),
+                           path=options.get("path"), limit=int(options.get("limit", 100)))
+
+        print(json.dumps(result, indent=2))
+        if not result.get("success"):
+            sys.exit(1)
+
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Git Access - Shared git layer for dartai scripts.
+
+Keeps long-lived `git cat-file --batch` / `--batch-check` processes open
+per repository, memoizes queries per HEAD and index state, and counts how
+many git processes were spawned and how long they took.
+"""
+
+import atexit
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# Record and field separators for the git log format used by iter_log
+GIT_LOG_FORMAT = "%x1e%H%x1f%h%x1f%s"
+GIT_LOG_FORMAT_WITH_BODY = "%x1e%H%x1f%h%x1f%s%x1f%b"
+GIT_LOG_CHUNK_SIZE = 65536
+
+STATS = {
+    "processes_spawned": 0,
+    "process_seconds": 0.0,
+    "batch_requests": 0,
+    "cache_hits": 0
+}
+
+_repos = {}
+
+
+def get_stats() -> dict:
+    """Get git process statistics for this process."""
+    return {**STATS, "process_seconds": round(STATS["process_seconds"], 3)}
+
+
+def get_repo(path) -> Optional["GitRepo"]:
+    """Get the shared GitRepo for the repository containing path, or None outside git."""
+    path = Path(path).resolve()
+    if path in _repos:
+        return _repos[path]
+
+    started = time.monotonic()
+    result = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel", "--git-dir", "--git-common-dir"],
+        cwd=path, capture_output=True, text=True
+    )
+    STATS["processes_spawned"] += 1
+    STATS["process_seconds"] += time.monotonic() - started
+
+    repo = None
+    if result.returncode == 0:
+        toplevel, git_dir, common_dir = result.stdout.strip().split("\n")[:3]
+        root = Path(toplevel)
+        if root in _repos:
+            repo = _repos[root]
+        else:
+            repo = GitRepo(root, (path / git_dir).resolve(), (path / common_dir).resolve())
+            _repos[root] = repo
+
+    _repos[path] = repo
+    return repo
+
+
+class GitRepo:
+    """A git repository with persistent cat-file processes and a memo cache."""
+
+    def __init__(self, root: Path, git_dir: Path, common_dir: Optional[Path] = None):
+        self.root = root
+        self.git_dir = git_dir
+        # Linked worktrees keep HEAD and index in git_dir but refs in common_dir
+        self.common_dir = common_dir or git_dir
+        self._batch = None
+        self._batch_check = None
+        self._memo = {}
+        self._memo_key = None
+
+    def run(self, args: list, cwd: Optional[Path] = None, text: bool = True,
+            input=None) -> subprocess.CompletedProcess:
+        """Run a one-off git command."""
+        started = time.monotonic()
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=cwd or self.root,
+                capture_output=True, text=text, input=input
+            )
+        finally:
+            STATS["processes_spawned"] += 1
+            STATS["process_seconds"] += time.monotonic() - started
+
+    def output(self, args: list, cwd: Optional[Path] = None, text: bool = True):
+        """Run a git command and return its stdout, or None on failure."""
+        result = self.run(args, cwd=cwd, text=text)
+        return result.stdout if result.returncode == 0 else None
+
+    def state_key(self) -> tuple:
+        """Identify the current HEAD and index state without spawning git."""
+        head_file = self.git_dir / "HEAD"
+        head = head_file.read_text().strip() if head_file.exists() else ""
+        if head.startswith("ref: "):
+            ref = head[5:]
+            ref_file = self.common_dir / ref
+            if ref_file.exists():
+                head = ref_file.read_text().strip()
+            else:
+                # Packed or missing ref; fall back to the packed-refs stat
+                packed = self.common_dir / "packed-refs"
+                head = f"{ref}@{packed.stat().st_mtime_ns if packed.exists() else 0}"
+
+        index_file = self.git_dir / "index"
+        index_stat = index_file.stat() if index_file.exists() else None
+        return (head, index_stat.st_mtime_ns if index_stat else 0, index_stat.st_size if index_stat else 0)
+
+    def memoized(self, key: tuple, compute):
+        """Return a cached value for key, invalidated when HEAD or the index changes."""
+        state = self.state_key()
+        if state != self._memo_key:
+            self._memo = {}
+            self._memo_key = state
+        if key in self._memo:
+            STATS["cache_hits"] += 1
+            return self._memo[key]
+        value = compute()
+        self._memo[key] = value
+        return value
+
+    def head(self) -> Optional[str]:
+        """Get the full SHA of HEAD."""
+        def compute():
+            output = self.output(["rev-parse", "HEAD"])
+            return output.strip() if output else None
+        return self.memoized(("head",), compute)
+
+    def changed_files(self, base: str = "HEAD", cwd: Optional[Path] = None) -> list:
+        """
+        List files changed in the working tree and index relative to base.
+
+        Working tree edits do not change the memo key, so this is not
+        memoized; it always costs one git process.
+        """
+        output = self.output(["diff", "--name-only", "-z", base], cwd=cwd)
+        return [f for f in (output or "").split("\0") if f]
+
+    def _batch_process(self, check_only: bool) -> subprocess.Popen:
+        """Start (once) the persistent cat-file process."""
+        attr = "_batch_check" if check_only else "_batch"
+        proc = getattr(self, attr)
+        if proc is None or proc.poll() is not None:
+            proc = subprocess.Popen(
+                ["git", "cat-file", "--batch-check" if check_only else "--batch"],
+                cwd=self.root, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+            STATS["processes_spawned"] += 1
+            setattr(self, attr, proc)
+        return proc
+
+    def _batch_request(self, spec: str, check_only: bool) -> Optional[tuple]:
+        """Send one object spec to cat-file and return (sha, type, size, content)."""
+        started = time.monotonic()
+        try:
+            proc = self._batch_process(check_only)
+            proc.stdin.write(spec.encode() + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().decode(errors="replace").rstrip("\n")
+            if header.endswith((" missing", " ambiguous")):
+                # "<spec> missing"; the spec itself may contain spaces
+                return None
+            fields = header.rsplit(" ", 2)
+            if len(fields) != 3 or not fields[2].isdigit():
+                return None
+            sha, obj_type, size = fields[0], fields[1], int(fields[2])
+            content = None
+            if not check_only:
+                content = proc.stdout.read(size)
+                proc.stdout.read(1)  # trailing newline
+            return sha, obj_type, size, content
+        finally:
+            STATS["batch_requests"] += 1
+            STATS["process_seconds"] += time.monotonic() - started
+
+    def object_info(self, spec: str) -> Optional[dict]:
+        """Get type and size of an object such as "HEAD:path/to/file"."""
+        def compute():
+            info = self._batch_request(spec, check_only=True)
+            return {"sha": info[0], "type": info[1], "size": info[2]} if info else None
+        return self.memoized(("info", spec), compute)
+
+    def read_blob(self, spec: str) -> Optional[bytes]:
+        """Read object content such as "HEAD:path/to/file" through the persistent process."""
+        def compute():
+            info = self._batch_request(spec, check_only=False)
+            return info[3] if info else None
+        return self.memoized(("blob", spec), compute)
+
+    def iter_log(self, rev_args: list, include_body: bool = False):
+        """
+        Stream commits with their file changes from a single git log process.
+
+        Runs `git log --name-status -z` and parses the NUL-separated output
+        incrementally, yielding one dict per commit (newest first) with its
+        hash, message (and body with include_body) and list of file changes.
+        Raises CalledProcessError if git exits with an error.
+        """
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            ["git", "log", "--name-status", "-z",
+             f"--format={GIT_LOG_FORMAT_WITH_BODY if include_body else GIT_LOG_FORMAT}", *rev_args],
+            cwd=self.root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        STATS["processes_spawned"] += 1
+
+        def tokens():
+            pending = b""
+            while True:
+                chunk = proc.stdout.read(GIT_LOG_CHUNK_SIZE)
+                if not chunk:
+                    break
+                parts = (pending + chunk).split(b"\0")
+                pending = parts.pop()
+                for part in parts:
+                    yield part.decode("utf-8", errors="replace").lstrip("\n")
+            if pending.strip():
+                yield pending.decode("utf-8", errors="replace").lstrip("\n")
+
+        commit = None
+        stream = tokens()
+        try:
+            for token in stream:
+                if token.startswith("\x1e"):
+                    if commit:
+                        yield commit
+                    sha, short_hash, message, body = (token[1:].split("\x1f", 3) + ["", "", ""])[:4]
+                    commit = {"sha": sha, "hash": short_hash, "message": message, "files": []}
+                    if include_body:
+                        commit["body"] = body.strip()
+                elif token and commit is not None:
+                    change = {"status": token[0], "path": next(stream, "")}
+                    if token[0] in "RC":
+                        # Renames and copies list the source path first
+                        change["old_path"] = change["path"]
+                        change["path"] = next(stream, "")
+                    commit["files"].append(change)
+            if commit:
+                yield commit
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read().decode(errors="replace")
+            proc.stderr.close()
+            returncode = proc.wait()
+            STATS["process_seconds"] += time.monotonic() - started
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, "git log", stderr=stderr)
+
+    def log(self, rev_args: list, include_body: bool = False) -> list:
+        """Get commits with file changes; memoized per HEAD and index state."""
+        return self.memoized(
+            ("log", tuple(rev_args), include_body),
+            lambda: list(self.iter_log(rev_args, include_body))
+        )
+
+    def close(self):
+        """Stop the persistent cat-file processes."""
+        for attr in ("_batch", "_batch_check"):
+            proc = getattr(self, attr)
+            if proc is not None and proc.poll() is None:
+                proc.stdin.close()
+                proc.wait()
+            setattr(self, attr, None)
+
+
+@atexit.register
+def _close_all():
+    """Close every persistent git process on interpreter exit."""
+    for repo in set(r for r in _repos.values() if r is not None):
+        repo.close()
+
+
+def main():
+    """CLI interface for ad-hoc git queries with process statistics."""
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage: git_access.py <command> <path> [args...]",
+            "commands": ["changed", "log", "show"]
+        }))
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    try:
+        repo = get_repo(sys.argv[2])
+        if repo is None:
+            print(json.dumps({"error": f"Not a git repository: {sys.argv[2]}"}))
+            sys.exit(1)
+
+        if command == "changed":
+            base = sys.argv[3] if len(sys.argv) > 3 else "HEAD"
+            result = {"files": repo.changed_files(base)}
+
+        elif command == "log":
+            rev_args = sys.argv[3:] or ["-10"]
+            result = {"commits": repo.log(rev_args)}
+
+        elif command == "show":
+            if len(sys.argv) < 4:
+                print(json.dumps({"error": "Object spec required, e.g. HEAD:README.md"}))
+                sys.exit(1)
+            content = repo.read_blob(sys.argv[3])
+            result = {
+                "found": content is not None,
+                "content": content.decode(errors="replace") if content is not None else None
+            }
+
+        else:
+            result = {"error": f"Unknown command: {command}"}
+
+        result["git_stats"] = get_stats()
+        print(json.dumps(result, indent=2))
+
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
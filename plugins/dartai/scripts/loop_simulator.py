@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Loop Simulator - Replay recorded dartai task durations under other schedules.
+
+Builds a workload from the dartai logs (the task_runner event log,
+task_updates.log, spawns.log or the loop_state.json run history) and
+replays it offline as one backlog under alternative ordering policies and
+slot counts, reporting simulated makespan, mean latency and slot
+utilization.
+"""
+
+import heapq
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import task_runner
+
+STATE_DIR = Path.home() / ".dartai"
+TASK_UPDATES_FILE = STATE_DIR / "task_updates.log"
+SPAWNS_FILE = STATE_DIR / "spawns.log"
+
+# Workload sources, best first; "auto" uses the first one with data
+SOURCES = ["events", "updates", "spawns", "history"]
+
+SPAWN_LINE_RE = re.compile(r"^(\S+) - Spawn #\d+: (.+)$")
+# Gaps between spawns longer than this are idle time, not task time
+SPAWN_GAP_LIMIT = 2 * 3600
+
+DEFAULT_SLOTS = [1, 2, 4]
+
+
+def events_workload() -> list:
+    """Get one job per task from the task_runner event log; retries add up."""
+    jobs = {}
+    for record in task_runner.task_records(task_runner.iter_all_events()):
+        job = jobs.setdefault(record["task_id"], {
+            "id": record["task_id"],
+            "title": record["title"],
+            "tags": record["tags"],
+            "dartboard": record["dartboard"],
+            "start": record["start"],
+            "end": record["end"],
+            "seconds": 0.0
+        })
+        job["seconds"] += record["seconds"] / record.get("batch_size", 1)
+        job["end"] = max(job["end"], record["end"])
+    return list(jobs.values())
+
+
+def find_value(data, keys: tuple):
+    """Find the first value stored under any of keys in nested hook input."""
+    if isinstance(data, dict):
+        for key in keys:
+            if isinstance(data.get(key), (str, int)):
+                return data[key]
+        for value in data.values():
+            found = find_value(value, keys)
+            if found is not None:
+                return found
+    return None
+
+
+def updates_workload(path: Path = TASK_UPDATES_FILE) -> list:
+    """
+    Get jobs from task_updates.log.
+
+    A task's duration runs from its first logged update to the update that
+    marked it done; tasks never marked done are skipped.
+    """
+    if not path.exists():
+        return []
+
+    seen = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            tool_input = entry.get("task_info", {}).get("tool_input", entry.get("task_info", {}))
+            task_id = find_value(tool_input, ("id", "task_id", "duid"))
+            if task_id is None:
+                continue
+            ts = datetime.fromisoformat(entry["timestamp"])
+            job = seen.setdefault(str(task_id), {"id": str(task_id), "start": ts, "end": None})
+            status = str(find_value(tool_input, ("status",)) or "").lower()
+            if status in task_runner.DONE_STATUSES:
+                job["end"] = ts
+            title = find_value(tool_input, ("title",))
+            if title:
+                job["title"] = str(title)
+
+    return [{
+        **job,
+        "title": job.get("title", ""),
+        "tags": [],
+        "seconds": (job["end"] - job["start"]).total_seconds()
+    } for job in seen.values() if job["end"] and job["end"] > job["start"]]
+
+
+def spawns_workload(path: Path = SPAWNS_FILE) -> list:
+    """
+    Get jobs from spawns.log, one per task-executor spawn.
+
+    Each job lasts until the next executor spawn, unless that gap is
+    longer than SPAWN_GAP_LIMIT. Logs without subagent types use every spawn.
+    """
+    if not path.exists():
+        return []
+
+    spawns = []
+    with open(path) as f:
+        for line in f:
+            match = SPAWN_LINE_RE.match(line.strip())
+            if match:
+                spawns.append((datetime.fromisoformat(match.group(1)), match.group(2)))
+
+    executors = [s for s in spawns if "task-executor" in s[1]] or spawns
+    jobs = []
+    for i, ((started, _), (ended, _)) in enumerate(zip(executors, executors[1:])):
+        seconds = (ended - started).total_seconds()
+        if 0 < seconds <= SPAWN_GAP_LIMIT:
+            jobs.append({"id": f"spawn-{i + 1}", "title": "", "tags": [],
+                         "start": started, "end": ended, "seconds": seconds})
+    return jobs
+
+
+def history_workload() -> list:
+    """Get jobs from loop run history, spreading each run evenly over its tasks."""
+    jobs = []
+    history = task_runner.get_history(full=True) or task_runner.get_history()
+    for i, run in enumerate(history):
+        count = run.get("tasks_completed", 0) + run.get("tasks_failed", 0)
+        if not count or not run.get("started_at") or not run.get("stopped_at"):
+            continue
+        started = datetime.fromisoformat(run["started_at"])
+        ended = datetime.fromisoformat(run["stopped_at"])
+        seconds = (ended - started).total_seconds() / count
+        jobs.extend({"id": f"run{i + 1}-{k + 1}", "title": "", "tags": [],
+                     "dartboard": run.get("dartboard"), "start": started, "end": ended,
+                     "seconds": seconds} for k in range(count))
+    return jobs
+
+
+def load_workload(source: str = "auto") -> tuple:
+    """Get (source, jobs) for a named source, or the best source with data."""
+    loaders = {
+        "events": events_workload,
+        "updates": updates_workload,
+        "spawns": spawns_workload,
+        "history": history_workload
+    }
+    for name in SOURCES if source == "auto" else [source]:
+        jobs = loaders[name]()
+        if jobs:
+            return name, jobs
+    return source, []
+
+
+def read_dependencies(path: Path) -> dict:
+    """Read task dependencies from a Dart task list file."""
+    with open(path) as f:
+        tasks = task_runner.read_task_list(f)
+    return {str(t["id"]): task_runner.task_dependencies(t) for t in tasks if t.get("id")}
+
+
+def simulate(jobs: list, policy: str, slots: int, dependencies: Optional[dict] = None) -> dict:
+    """
+    Replay jobs as one backlog available at time zero on a number of slots.
+
+    Whenever a slot is free, the ready job ranked first by policy starts;
+    jobs wait for their dependencies. Latency is a job's completion time.
+    """
+    if slots < 1:
+        raise ValueError("At least one slot required")
+    by_id = {job["id"]: job for job in jobs}
+    order = {job["id"]: i for i, job in enumerate(jobs)}
+    deps = {
+        job_id: {d for d in (dependencies or {}).get(job_id, []) if d in by_id and d != job_id}
+        for job_id in by_id
+    }
+    dependents = {job_id: [] for job_id in by_id}
+    for job_id, job_deps in deps.items():
+        for dep in job_deps:
+            dependents[dep].append(job_id)
+
+    # Longest expected chain from each job, for the critical-path policy
+    critical = {}
+
+    def chain(job_id, visiting=()):
+        if job_id not in critical:
+            downstream = [chain(d, visiting + (job_id,)) for d in dependents[job_id] if d not in visiting]
+            critical[job_id] = by_id[job_id]["expected"] + max(downstream, default=0.0)
+        return critical[job_id]
+
+    def rank(job_id):
+        if policy == "sjf":
+            return (by_id[job_id]["expected"], order[job_id])
+        if policy == "critical-path":
+            return (-chain(job_id), order[job_id])
+        return (order[job_id],)
+
+    waiting = {job_id: len(job_deps) for job_id, job_deps in deps.items()}
+    ready = [(rank(job_id), job_id) for job_id, n in waiting.items() if n == 0]
+    heapq.heapify(ready)
+    free = list(range(slots))
+    running = []
+    completion = {}
+    now = 0.0
+
+    while ready or running:
+        while ready and free:
+            _, job_id = heapq.heappop(ready)
+            heapq.heappush(running, (now + by_id[job_id]["seconds"], free.pop(), job_id))
+        now, slot, job_id = heapq.heappop(running)
+        free.append(slot)
+        completion[job_id] = now
+        for dependent in dependents[job_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, (rank(dependent), dependent))
+
+    work = sum(by_id[job_id]["seconds"] for job_id in completion)
+    latencies = list(completion.values())
+    p90 = task_runner.percentile(latencies, 90)
+    return {
+        "policy": policy,
+        "slots": slots,
+        "makespan_seconds": round(now, 1),
+        "mean_latency_seconds": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "p90_latency_seconds": round(p90, 1) if p90 is not None else None,
+        "utilization": round(work / (slots * now), 3) if now else 0.0,
+        "unscheduled": sorted(set(by_id) - set(completion))
+    }
+
+
+def run_simulation(source: str = "auto", policies: Optional[list] = None,
+                   slot_counts: Optional[list] = None, tasks_file: Optional[Path] = None,
+                   oracle: bool = False) -> dict:
+    """
+    Simulate the recorded workload under every policy and slot count.
+
+    SJF and critical-path rank jobs by durations estimated the way
+    task_runner does, learned from the replayed log; jobs without a title
+    or tags, or every job with oracle=True, are ranked by their actual
+    duration.
+    """
+    policies = policies or task_runner.SCHEDULE_POLICIES
+    slot_counts = slot_counts or DEFAULT_SLOTS
+    if any(slots < 1 for slots in slot_counts):
+        return {"success": False, "error": "Slot counts must be at least 1", "slots": slot_counts}
+    unknown = [p for p in policies if p not in task_runner.SCHEDULE_POLICIES]
+    if unknown:
+        return {"success": False, "error": f"Unknown policy: {', '.join(unknown)}",
+                "policies": task_runner.SCHEDULE_POLICIES}
+
+    source, jobs = load_workload(source)
+    if not jobs:
+        return {"success": False, "error": f"No task durations found (source: {source})"}
+
+    # Replay in the order the work was originally started
+    jobs.sort(key=lambda job: job["start"])
+    estimates = task_runner.learn_estimates([
+        {**job, "dartboard": job.get("dartboard"), "success": True, "batch_size": 1} for job in jobs
+    ])
+    for job in jobs:
+        if oracle or not (job["title"] or job["tags"]):
+            job["expected"], job["estimate_basis"] = job["seconds"], "actual"
+        else:
+            job["expected"], job["estimate_basis"] = task_runner.estimate_duration(
+                job["title"], job["tags"], job.get("dartboard"), estimates)
+
+    dependencies = read_dependencies(tasks_file) if tasks_file else None
+    results = [simulate(jobs, policy, slots, dependencies)
+               for slots in slot_counts for policy in policies]
+
+    return {
+        "success": True,
+        "source": source,
+        "jobs": len(jobs),
+        "total_work_seconds": round(sum(job["seconds"] for job in jobs), 1),
+        "recorded_span_seconds": round((max(job["end"] for job in jobs) -
+                                        min(job["start"] for job in jobs)).total_seconds(), 1),
+        "estimates": "oracle" if oracle else "learned",
+        "dependencies": len(dependencies) if dependencies else 0,
+        "results": results,
+        "best": min(results, key=lambda r: (r["makespan_seconds"], r["mean_latency_seconds"]))
+    }
+
+
+def main():
+    """CLI interface for the loop simulator."""
+    options = {"source": "auto", "policies": None, "slots": None, "tasks": None}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            options[key] = value
+        elif arg == "--oracle":
+            options["oracle"] = True
+        else:
+            print(json.dumps({
+                "error": "Usage: loop_simulator.py [--source=auto|events|updates|spawns|history] "
+                         "[--policies=fifo,sjf,critical-path] [--slots=1,2,4] [--tasks=<task list>] [--oracle]"
+            }))
+            sys.exit(1)
+
+    try:
+        if options["source"] not in ["auto", *SOURCES]:
+            raise ValueError(f"Unknown source: {options['source']}")
+        result = run_simulation(
+            source=options["source"],
+            policies=options["policies"].split(",") if options["policies"] else None,
+            slot_counts=[int(n) for n in options["slots"].split(",")] if options["slots"] else None,
+            tasks_file=Path(options["tasks"]) if options["tasks"] else None,
+            oracle=options.get("oracle", False)
+        )
+        print(json.dumps(result, indent=2, default=str))
+        if not result.get("success"):
+            sys.exit(1)
+
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+import event_store
+
 STATE_DIR = Path.home() / ".dartai"
 
 
@@ -40,6 +42,15 @@ def on_task_update():
     with open(log_file, "a") as f:
         f.write(json.dumps(log_entry) + "\n")
 
+    tool_input = task_info.get("tool_input", task_info)
+    event_store.insert(
+        "tasks", ts=log_entry["timestamp"],
+        task_id=event_store.find_value(tool_input, ("id", "task_id", "duid")),
+        status=event_store.find_value(tool_input, ("status",)),
+        title=event_store.find_value(tool_input, ("title",)),
+        working_dir=log_entry["working_dir"], data=json.dumps(task_info)
+    )
+
     return {
         "success": True,
         "logged": True,
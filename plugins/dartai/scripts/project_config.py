@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Project Config - Shared reader and writer for .claude/dartai.local.md.
+
+The config is a markdown file with YAML frontmatter. The frontmatter
+dartai writes is flat `key: value` pairs, so it is parsed without PyYAML;
+PyYAML is imported only for frontmatter outside that subset. Parsed
+results are cached in a sidecar JSON file keyed by the config's mtime and
+size, and writes are atomic under a lock so concurrent hooks never see or
+produce a torn config.
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Callable
+
+from state_store import file_lock, write_atomic
+
+CONFIG_FILE = Path(".claude") / "dartai.local.md"
+
+# Parse caches live outside the project so they never show up in git status
+CACHE_DIR = Path.home() / ".dartai" / "config_cache"
+
+# Plain scalars that YAML 1.1 (PyYAML) would read as something other than a string
+YAML_SPECIAL_RE = re.compile(
+    r"^(~|null|Null|NULL|true|True|TRUE|false|False|FALSE|yes|Yes|YES|no|No|NO|on|On|ON|off|Off|OFF"
+    r"|[-+]?(\d[\d_]*)?\.?\d+([eE][-+]?\d+)?|[-+]?0x[0-9a-fA-F_]+|[-+]?0b[01_]+|0o[0-7]+"
+    r"|[-+]?\d[\d_]*(:[0-5]?\d)+(\.[\d_]*)?|[-+]?\.(inf|Inf|INF|nan|NaN|NAN)|=|<<"
+    r"|\d{4}-\d\d?-\d\d?([Tt ].*)?)$"
+)
+FLAT_LINE_RE = re.compile(r"^([A-Za-z_][\w.-]*):(?:\s+(.*?))?\s*$")
+# Only the number forms PyYAML reads the same way: no leading zeros (octal),
+# and floats need a dot and a signed exponent
+INT_RE = re.compile(r"^[-+]?(0|[1-9]\d*)$")
+FLOAT_RE = re.compile(r"^([-+]?\d+\.\d*|\.\d+)([eE][-+]\d+)?$")
+# Characters a plain YAML scalar cannot start with
+PLAIN_START_INDICATORS = ",[]{}#&*!|>%@`"
+
+
+class NotFlat(ValueError):
+    """Frontmatter uses YAML beyond flat key: value pairs."""
+
+
+class FrontmatterError(ValueError):
+    """Frontmatter could not be parsed, e.g. it needs PyYAML and PyYAML is missing."""
+
+
+def cache_path(path: Path) -> Path:
+    """Get the parse cache sidecar for a config file."""
+    key = hashlib.sha1(str(path.resolve()).encode()).hexdigest()
+    return CACHE_DIR / f"{path.name}-{key}.json"
+
+
+def parse_scalar(raw: str):
+    """
+    Parse one flat value: null, bool, number, quoted or plain string.
+
+    Raises NotFlat for anything PyYAML might read differently, including
+    flow collections, so those always go through YAML.
+    """
+    value = raw
+    if not value.startswith(("'", '"')) and " #" in value:
+        value = value.split(" #", 1)[0].rstrip()
+
+    if value in ("", "~", "null", "Null", "NULL"):
+        return None
+    if value in ("true", "True", "TRUE"):
+        return True
+    if value in ("false", "False", "FALSE"):
+        return False
+    if INT_RE.match(value):
+        return int(value)
+    if FLOAT_RE.match(value):
+        return float(value)
+    if value.startswith('"'):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            raise NotFlat(raw)
+    if value.startswith("'"):
+        inner = value[1:-1]
+        if not value.endswith("'") or len(value) < 2 or "'" in inner.replace("''", ""):
+            raise NotFlat(raw)
+        return inner.replace("''", "'")
+    if value[0] in PLAIN_START_INDICATORS or value[0] in "-?:" and (len(value) == 1 or value[1] == " ") \
+            or ": " in value or value.endswith(":") or "\t" in value or YAML_SPECIAL_RE.match(value):
+        # Flow collections, anchors, tags, block scalars, yes/no, dates... leave them to YAML
+        raise NotFlat(raw)
+    return value
+
+
+def parse_flat(text: str) -> dict:
+    """Parse flat `key: value` frontmatter; raises NotFlat for anything else."""
+    data = {}
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        match = FLAT_LINE_RE.match(line)
+        if not match or YAML_SPECIAL_RE.match(match.group(1)):
+            # Keys such as on, yes or null are not strings to YAML
+            raise NotFlat(line)
+        data[match.group(1)] = parse_scalar(match.group(2) or "")
+    return data
+
+
+def load_yaml(text: str) -> dict:
+    """Parse frontmatter with PyYAML, adding site-packages (user site included) if run with -S."""
+    try:
+        import yaml
+    except ImportError:
+        if not sys.flags.no_site:
+            raise
+        import site
+        site.main()
+        import yaml
+    return yaml.safe_load(text) or {}
+
+
+def parse_frontmatter(text: str) -> dict:
+    """
+    Parse frontmatter, falling back to PyYAML outside the flat subset.
+
+    Raises FrontmatterError when PyYAML is missing or rejects the text.
+    """
+    try:
+        return parse_flat(text)
+    except NotFlat:
+        pass
+    try:
+        data = load_yaml(text)
+    except Exception as e:
+        raise FrontmatterError(f"Could not parse frontmatter: {e}")
+    if not isinstance(data, dict):
+        raise FrontmatterError("Frontmatter is not a mapping")
+    return data
+
+
+def split_config(text: str) -> dict:
+    """
+    Split config text into parsed frontmatter and markdown content.
+
+    Unparseable frontmatter reads as empty, with the reason under "error".
+    """
+    if text.startswith("---"):
+        parts = text.split("---", 2)
+        if len(parts) >= 3:
+            try:
+                return {"frontmatter": parse_frontmatter(parts[1]), "content": parts[2].strip()}
+            except FrontmatterError as e:
+                return {"frontmatter": {}, "content": parts[2].strip(), "error": str(e)}
+    return {"frontmatter": {}, "content": text}
+
+
+def read_config(path: Path = CONFIG_FILE) -> dict:
+    """
+    Read the config as {"frontmatter": dict, "content": str}.
+
+    Served from the sidecar cache while the config's mtime and size match.
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {"frontmatter": {}, "content": ""}
+    key = [stat.st_mtime_ns, stat.st_size]
+
+    sidecar = cache_path(path)
+    try:
+        cached = json.loads(sidecar.read_text())
+        if cached.get("key") == key:
+            return {"frontmatter": cached["frontmatter"], "content": cached["content"]}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    config = split_config(path.read_text())
+    if "error" in config:
+        return config  # not cached, so installing PyYAML fixes it
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        write_atomic(sidecar, json.dumps({"key": key, **config}, default=str))
+    except (OSError, TypeError):
+        pass  # the cache is an optimization only
+    return config
+
+
+def format_scalar(value) -> str:
+    """Format a value so parse_scalar (and YAML) read it back unchanged."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return repr(value)
+    if isinstance(value, float):
+        if value != value:
+            return ".nan"
+        if value in (float("inf"), float("-inf")):
+            return ".inf" if value > 0 else "-.inf"
+        text = repr(value)
+        # YAML 1.1 floats need a dot and a signed exponent, e.g. 1.0e+16
+        mantissa, _, exponent = text.partition("e")
+        if "." not in mantissa:
+            mantissa += ".0"
+        if exponent and exponent[0] not in "+-":
+            exponent = "+" + exponent
+        return f"{mantissa}e{exponent}" if exponent else mantissa
+    if isinstance(value, str):
+        try:
+            if parse_scalar(value) == value and value == value.strip() and "#" not in value:
+                return value
+        except NotFlat:
+            pass
+    # JSON strings, lists and objects are valid YAML flow scalars/collections
+    return json.dumps(value, default=str)
+
+
+def dump_frontmatter(frontmatter: dict) -> str:
+    """Serialize frontmatter as flat key: value lines."""
+    return "".join(f"{key}: {format_scalar(value)}\n" for key, value in frontmatter.items())
+
+
+def write_config(frontmatter: dict, content: str = "", path: Path = CONFIG_FILE):
+    """Atomically write the config with frontmatter and markdown content."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, f"---\n{dump_frontmatter(frontmatter)}---\n\n{content}")
+
+
+def update_config(mutate: Callable[[dict], None], path: Path = CONFIG_FILE) -> dict:
+    """
+    Apply mutate to the frontmatter under a lock and write it back atomically.
+
+    Raises FrontmatterError instead of writing when the existing
+    frontmatter could not be parsed, so no keys are dropped.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        config = read_config(path)
+        if "error" in config:
+            raise FrontmatterError(f"{config['error']}; not rewriting {path}")
+        mutate(config["frontmatter"])
+        write_config(config["frontmatter"], config["content"], path)
+    return config
+
+
+def get_value(key: str, default=None, path: Path = CONFIG_FILE):
+    """Get one frontmatter value."""
+    return read_config(path)["frontmatter"].get(key, default)
+
+
+def main():
+    """CLI interface for reading the parsed project config."""
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else CONFIG_FILE
+    try:
+        print(json.dumps(read_config(path), indent=2, default=str))
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,59 @@ This script orchestrates quality checks for code changes made during
 task execution.
 """
 
+import hashlib
+import heapq
 import json
 import os
+import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from git_access import get_repo
+
+# Per-test durations recorded from previous sharded runs
+DURATIONS_FILE = Path(".claude") / "dartai-test-durations.json"
+
+# Failing test ids from the most recent test run
+FAILED_TESTS_FILE = Path(".claude") / "dartai-failed-tests.json"
+
+# Latest results published by watch mode, tagged with a tree fingerprint
+WATCH_RESULTS_FILE = Path(".claude") / "dartai-quality-watch.json"
+
+# Checks run when none are named, and the result type each one reports
+DEFAULT_CHECKS = ["lint", "test"]
+CHECK_TYPES = {"lint": "linting", "test": "testing"}
+
+# Fallback estimate for tests without a recorded duration
+DEFAULT_TEST_SECONDS = 1.0
+
+PYTEST_OUTCOME_RE = re.compile(
+    r"^(?P<id>\S.*?::.+?) (?P<outcome>PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b"
+)
+PYTEST_DURATION_RE = re.compile(r"^(?P<seconds>\d+(?:\.\d+)?)s (?P<phase>setup|call|teardown)\s+(?P<id>\S.*)$")
+GO_OUTCOME_RE = re.compile(r"^\s*--- (?P<outcome>PASS|FAIL|SKIP): (?P<id>\S+) \((?P<seconds>\d+(?:\.\d+)?)s\)")
+GO_TEST_NAME_RE = re.compile(r"^(Test|Benchmark|Example|Fuzz)\w*$")
+# Per-package result line that follows a package's tests in go test output
+GO_PACKAGE_RE = re.compile(r"^(?:ok|FAIL|\?)\s+(?P<package>\S+)(?:\s|$)")
+
+# Ignored dependency directories linked into snapshots so tools still resolve
+SNAPSHOT_LINKED_DIRS = ["node_modules", ".venv", "venv", "target"]
+
+# Tool caches and dependency directories that never affect check results
+FINGERPRINT_IGNORED_DIRS = {".git", "__pycache__", ".pytest_cache", ".ruff_cache", *SNAPSHOT_LINKED_DIRS}
+
+# CLI options that take a value; all other --options are boolean flags
+VALUE_OPTIONS = {"shards", "interval", "debounce"}
+
 
 def detect_project_type(project_dir: Path) -> dict:
     """Detect the project type based on config files."""
@@ -38,33 +84,95 @@ def detect_project_type(project_dir: Path) -> dict:
     }
 
 
-def run_command(cmd: list, cwd: Optional[Path] = None) -> dict:
-    """Run a command and return result."""
+def resource_usage(rusage, wall_seconds: float) -> dict:
+    """Convert a child rusage into the per-check resources record."""
+    usage = {"wall_seconds": round(wall_seconds, 3)}
+    if rusage is None:
+        return usage
+
+    cpu_seconds = rusage.ru_utime + rusage.ru_stime
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss_kb = rusage.ru_maxrss / 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    usage.update({
+        "user_cpu_seconds": round(rusage.ru_utime, 3),
+        "sys_cpu_seconds": round(rusage.ru_stime, 3),
+        "max_rss_mb": round(max_rss_kb / 1024, 1),
+        "cpu_utilization": round(cpu_seconds / wall_seconds, 2) if wall_seconds > 0 else None
+    })
+    return usage
+
+
+def run_command(cmd: list, cwd: Optional[Path] = None, timeout: int = 300) -> dict:
+    """
+    Run a command and return result with its resource usage.
+
+    CPU time and max RSS come from os.wait4, so they cover the child and
+    every descendant it waited for; max RSS is the largest single process,
+    not the sum. Platforms without wait4 only report wall time.
+    """
+    started = time.monotonic()
     try:
-        result = subprocess.run(
-            cmd,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
-        return {
-            "success": result.returncode == 0,
-            "exit_code": result.returncode,
-            "stdout": result.stdout,
-            "stderr": result.stderr
-        }
+        if not hasattr(os, "wait4"):
+            result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+            return {
+                "success": result.returncode == 0,
+                "exit_code": result.returncode,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "resources": resource_usage(None, time.monotonic() - started)
+            }
+
+        # Output goes to temp files so the child can be reaped with wait4
+        with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(cmd, cwd=cwd, stdout=stdout_file, stderr=stderr_file)
+            reaped = {}
+            reaper = threading.Thread(
+                target=lambda: reaped.update(zip(("pid", "status", "rusage"), os.wait4(proc.pid, 0))),
+                daemon=True
+            )
+            reaper.start()
+            reaper.join(timeout)
+
+            timed_out = reaper.is_alive()
+            if timed_out:
+                proc.kill()
+                reaper.join()
+
+            exit_code = os.waitstatus_to_exitcode(reaped["status"])
+            # The child is already reaped; keep Popen from waiting on it again
+            proc.returncode = exit_code
+            resources = resource_usage(reaped["rusage"], time.monotonic() - started)
+
+            if timed_out:
+                return {
+                    "success": False,
+                    "exit_code": -1,
+                    "error": f"Command timed out after {timeout // 60} minutes",
+                    "resources": resources
+                }
+
+            stdout_file.seek(0)
+            stderr_file.seek(0)
+            return {
+                "success": exit_code == 0,
+                "exit_code": exit_code,
+                "stdout": stdout_file.read().decode(errors="replace"),
+                "stderr": stderr_file.read().decode(errors="replace"),
+                "resources": resources
+            }
     except subprocess.TimeoutExpired:
         return {
             "success": False,
             "exit_code": -1,
-            "error": "Command timed out after 5 minutes"
+            "error": f"Command timed out after {timeout // 60} minutes",
+            "resources": resource_usage(None, time.monotonic() - started)
         }
     except Exception as e:
         return {
             "success": False,
             "exit_code": -1,
-            "error": str(e)
+            "error": str(e),
+            "resources": resource_usage(None, time.monotonic() - started)
         }
 
 
@@ -166,8 +274,17 @@ def run_linting(project_dir: Path, project_type: str) -> dict:
     return results
 
 
-def run_tests(project_dir: Path, project_type: str) -> dict:
-    """Run tests for the project type."""
+def run_tests(project_dir: Path, project_type: str, shards: int = 0,
+              state_dir: Optional[Path] = None, rerun_failed: bool = False) -> dict:
+    """
+    Run tests for the project type, optionally split into parallel shards.
+
+    state_dir is where recorded test durations and failures live; it
+    defaults to project_dir and differs when tests run inside a snapshot.
+    With rerun_failed, the tests that failed last time run first and the
+    full suite only runs once they pass.
+    """
+    state_dir = state_dir or project_dir
     results = {
         "type": "testing",
         "project_type": project_type,
@@ -175,6 +292,35 @@ def run_tests(project_dir: Path, project_type: str) -> dict:
         "checks": []
     }
 
+    if rerun_failed and project_type in ["python", "go"]:
+        previously_failed = load_failed_tests(state_dir, project_type)
+        if previously_failed:
+            rerun_result = run_command(build_shard_command(project_type, previously_failed), cwd=project_dir)
+            outcomes, _ = parse_test_outcomes(project_type, rerun_result.get("stdout", ""))
+            rerun_check = {
+                "tool": ("pytest" if project_type == "python" else "go test") + " (rerun failed)",
+                **rerun_result,
+                "tests": summarize_outcomes(outcomes, len(previously_failed))
+            }
+            results["checks"].append(rerun_check)
+            results["rerun_failed"] = {"previously_failed": len(previously_failed)}
+
+            # Only stop early on real test failures; unknown ids escalate
+            if not rerun_result["success"] and rerun_check["tests"]["failed"]:
+                save_failed_tests(state_dir, project_type, rerun_check["tests"]["failed"])
+                results["passed"] = False
+                results["rerun_failed"]["escalated"] = False
+                return results
+            results["rerun_failed"]["escalated"] = True
+
+    if shards > 1 and project_type in ["python", "go"]:
+        sharded_result = run_sharded_tests(project_dir, project_type, shards, state_dir)
+        if sharded_result is not None:
+            results["checks"].append(sharded_result)
+            results["passed"] = sharded_result["success"]
+            save_failed_tests(state_dir, project_type, sharded_result["tests"]["failed"])
+            return results
+
     if project_type in ["javascript", "typescript"]:
         # npm test
         test_result = run_command(
@@ -194,12 +340,16 @@ def run_tests(project_dir: Path, project_type: str) -> dict:
             ["go", "test", "-v", "./..."],
             cwd=project_dir
         )
+        outcomes, _ = parse_test_outcomes(project_type, test_result.get("stdout", ""))
+        test_summary = summarize_outcomes(outcomes)
         results["checks"].append({
             "tool": "go test",
-            **test_result
+            **test_result,
+            "tests": test_summary
         })
         if not test_result["success"]:
             results["passed"] = False
+        save_failed_tests(state_dir, project_type, test_summary["failed"])
 
     elif project_type == "python":
         # pytest
@@ -207,12 +357,16 @@ def run_tests(project_dir: Path, project_type: str) -> dict:
             ["pytest", "-v"],
             cwd=project_dir
         )
+        outcomes, _ = parse_test_outcomes(project_type, test_result.get("stdout", ""))
+        test_summary = summarize_outcomes(outcomes)
         results["checks"].append({
             "tool": "pytest",
-            **test_result
+            **test_result,
+            "tests": test_summary
         })
         if not test_result["success"]:
             results["passed"] = False
+        save_failed_tests(state_dir, project_type, test_summary["failed"])
 
     elif project_type == "rust":
         # cargo test
@@ -230,8 +384,449 @@ def run_tests(project_dir: Path, project_type: str) -> dict:
     return results
 
 
-def check_quality(project_dir: str, checks: Optional[list] = None) -> dict:
-    """Run quality checks on the project."""
+def load_test_durations(project_dir: Path) -> dict:
+    """Load recorded per-test durations for the project."""
+    durations_path = project_dir / DURATIONS_FILE
+    if durations_path.exists():
+        try:
+            with open(durations_path) as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def save_test_durations(project_dir: Path, durations: dict):
+    """Merge newly measured durations into the recorded durations."""
+    if not durations:
+        return
+
+    recorded = load_test_durations(project_dir)
+    recorded.update(durations)
+
+    durations_path = project_dir / DURATIONS_FILE
+    durations_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = durations_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(recorded, f, sort_keys=True)
+    os.replace(tmp_path, durations_path)
+
+
+def load_failed_tests(project_dir: Path, project_type: str) -> list:
+    """Load the failing test ids recorded by the previous run."""
+    failed_path = project_dir / FAILED_TESTS_FILE
+    if failed_path.exists():
+        try:
+            with open(failed_path) as f:
+                recorded = json.load(f)
+            if recorded.get("project_type") == project_type:
+                return recorded.get("failed", [])
+        except Exception:
+            pass
+    return []
+
+
+def save_failed_tests(project_dir: Path, project_type: str, failed: list):
+    """Record the failing test ids of a run, replacing the previous record."""
+    failed_path = project_dir / FAILED_TESTS_FILE
+    failed_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = failed_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "project_type": project_type,
+            "recorded_at": datetime.now().isoformat(),
+            "failed": failed
+        }, f, indent=2)
+    os.replace(tmp_path, failed_path)
+
+
+def collect_test_ids(project_dir: Path, project_type: str) -> list:
+    """Collect test ids without running them."""
+    if project_type == "python":
+        result = run_command(["pytest", "--collect-only", "-q"], cwd=project_dir)
+        if not result["success"]:
+            return []
+        return [
+            line.strip() for line in result["stdout"].splitlines()
+            if "::" in line and not line.startswith(" ")
+        ]
+
+    if project_type == "go":
+        result = run_command(["go", "test", "-list", ".*", "./..."], cwd=project_dir)
+        if not result["success"]:
+            return []
+        # Ids are package::Name, since the same name may exist in several packages
+        test_ids, names = [], []
+        for line in result["stdout"].splitlines():
+            if GO_TEST_NAME_RE.match(line.strip()):
+                names.append(line.strip())
+                continue
+            match = GO_PACKAGE_RE.match(line)
+            if match:
+                test_ids.extend(f"{match.group('package')}::{name}" for name in names)
+                names = []
+        return sorted(test_ids)
+
+    return []
+
+
+def go_package(test_id: str) -> str:
+    """Get the package of a Go test id (package::Name)."""
+    return test_id.split("::", 1)[0]
+
+
+def package_durations(test_ids: list, durations: dict) -> dict:
+    """Sum recorded Go test durations per package, estimating unknown tests."""
+    known = [durations[t] for t in test_ids if t in durations]
+    default = sum(known) / len(known) if known else DEFAULT_TEST_SECONDS
+    totals = {}
+    for test_id in test_ids:
+        package = go_package(test_id)
+        totals[package] = totals.get(package, 0.0) + durations.get(test_id, default)
+    return totals
+
+
+def split_into_shards(test_ids: list, durations: dict, shard_count: int) -> list:
+    """Split test ids into balanced shards using longest-processing-time first."""
+    known = [durations[t] for t in test_ids if t in durations]
+    default = sum(known) / len(known) if known else DEFAULT_TEST_SECONDS
+
+    weighted = sorted(
+        ((durations.get(t, default), t) for t in test_ids),
+        key=lambda item: (-item[0], item[1])
+    )
+
+    shards = [{"index": i, "test_ids": [], "estimated_seconds": 0.0} for i in range(shard_count)]
+    heap = [(0.0, i) for i in range(shard_count)]
+
+    for seconds, test_id in weighted:
+        load, index = heapq.heappop(heap)
+        shards[index]["test_ids"].append(test_id)
+        shards[index]["estimated_seconds"] = load + seconds
+        heapq.heappush(heap, (load + seconds, index))
+
+    return [s for s in shards if s["test_ids"]]
+
+
+def build_shard_command(project_type: str, test_ids: list) -> list:
+    """Build the test command that runs exactly the given test ids."""
+    if project_type == "python":
+        return ["pytest", "-v", "--durations=0", "-p", "no:cacheprovider", *test_ids]
+
+    if all(GO_TEST_NAME_RE.match(t) for t in test_ids):
+        # Bare names come from failed-test records written before ids had packages
+        return ["go", "test", "-v", "-run", go_run_pattern(test_ids), "./..."]
+
+    # Shards pass whole packages; package::Name ids (rerun-failed) also select
+    # tests, limited to the packages they failed in
+    command = ["go", "test", "-v"]
+    names = [t.split("::", 1)[1] for t in test_ids if "::" in t]
+    if names:
+        command += ["-run", go_run_pattern(names)]
+    return command + sorted({go_package(t) for t in test_ids})
+
+
+def go_run_pattern(names: list) -> str:
+    """Build a go test -run pattern matching exactly the given top-level tests."""
+    top_level = sorted({n.split("/", 1)[0] for n in names})
+    return "^(" + "|".join(re.escape(n) for n in top_level) + ")$"
+
+
+def parse_test_outcomes(project_type: str, output: str) -> tuple:
+    """Parse per-test outcomes and durations from verbose test output."""
+    outcomes = {}
+    durations = {}
+    pending, pending_durations = {}, {}
+
+    for line in output.splitlines():
+        if project_type == "python":
+            match = PYTEST_OUTCOME_RE.match(line)
+            if match:
+                outcomes[match.group("id")] = match.group("outcome").lower()
+                continue
+            match = PYTEST_DURATION_RE.match(line.strip())
+            if match:
+                test_id = match.group("id").strip()
+                durations[test_id] = durations.get(test_id, 0.0) + float(match.group("seconds"))
+        else:
+            match = GO_OUTCOME_RE.match(line)
+            if match:
+                test_id = match.group("id")
+                pending[test_id] = {"PASS": "passed", "FAIL": "failed", "SKIP": "skipped"}[match.group("outcome")]
+                if "/" not in test_id:
+                    pending_durations[test_id] = float(match.group("seconds"))
+                continue
+            # Output is grouped by package, each closed by its result line
+            match = GO_PACKAGE_RE.match(line)
+            if match:
+                package = match.group("package")
+                outcomes.update((f"{package}::{t}", o) for t, o in pending.items())
+                durations.update((f"{package}::{t}", d) for t, d in pending_durations.items())
+                pending, pending_durations = {}, {}
+
+    return outcomes, durations
+
+
+def summarize_outcomes(outcomes: dict, total: Optional[int] = None) -> dict:
+    """Summarize parsed per-test outcomes into counts and failing ids."""
+    return {
+        "total": total if total is not None else len(outcomes),
+        "passed": sum(1 for o in outcomes.values() if o == "passed"),
+        "failed": sorted(t for t, o in outcomes.items() if o in ("failed", "error"))
+    }
+
+
+def combine_resources(usages: list, wall_seconds: float) -> dict:
+    """Combine resource usage of parallel commands: CPU adds up, RSS takes the peak."""
+    combined = {"wall_seconds": round(wall_seconds, 3)}
+    if usages and all("user_cpu_seconds" in u for u in usages):
+        combined["user_cpu_seconds"] = round(sum(u["user_cpu_seconds"] for u in usages), 3)
+        combined["sys_cpu_seconds"] = round(sum(u["sys_cpu_seconds"] for u in usages), 3)
+        combined["max_rss_mb"] = max(u["max_rss_mb"] for u in usages)
+        cpu_seconds = combined["user_cpu_seconds"] + combined["sys_cpu_seconds"]
+        combined["cpu_utilization"] = round(cpu_seconds / wall_seconds, 2) if wall_seconds > 0 else None
+    return combined
+
+
+def run_sharded_tests(project_dir: Path, project_type: str, shard_count: int,
+                      state_dir: Optional[Path] = None) -> Optional[dict]:
+    """
+    Run the test suite as parallel shards balanced by recorded durations.
+
+    Returns None when test ids cannot be collected, so the caller can fall
+    back to a single unsharded run.
+    """
+    state_dir = state_dir or project_dir
+    test_ids = collect_test_ids(project_dir, project_type)
+    if not test_ids:
+        return None
+
+    durations = load_test_durations(state_dir)
+    if project_type == "go":
+        # Shard whole packages; -run patterns would match names across packages
+        shards = split_into_shards(sorted({go_package(t) for t in test_ids}),
+                                   package_durations(test_ids, durations), shard_count)
+        for shard in shards:
+            shard["test_count"] = sum(1 for t in test_ids if go_package(t) in shard["test_ids"])
+    else:
+        shards = split_into_shards(test_ids, durations, shard_count)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        shard_runs = list(pool.map(
+            lambda shard: run_command(build_shard_command(project_type, shard["test_ids"]), cwd=project_dir),
+            shards
+        ))
+
+    outcomes = {}
+    measured = {}
+    shard_results = []
+    for shard, run in zip(shards, shard_runs):
+        shard_outcomes, shard_durations = parse_test_outcomes(project_type, run.get("stdout", ""))
+        outcomes.update(shard_outcomes)
+        measured.update(shard_durations)
+        shard_results.append({
+            "shard": shard["index"],
+            "test_count": shard.get("test_count", len(shard["test_ids"])),
+            "estimated_seconds": round(shard["estimated_seconds"], 2),
+            "success": run["success"],
+            "exit_code": run["exit_code"],
+            "resources": run.get("resources", {}),
+            **({"error": run["error"]} if "error" in run else {})
+        })
+
+    save_test_durations(state_dir, measured)
+
+    return {
+        "tool": "pytest" if project_type == "python" else "go test",
+        "success": all(run["success"] for run in shard_runs),
+        "exit_code": max((run["exit_code"] for run in shard_runs), key=abs),
+        "stdout": "\n".join(run.get("stdout", "") for run in shard_runs),
+        "stderr": "\n".join(run.get("stderr", "") for run in shard_runs),
+        "resources": combine_resources(
+            [run.get("resources", {}) for run in shard_runs],
+            time.monotonic() - started
+        ),
+        "shards": shard_results,
+        "tests": summarize_outcomes(outcomes, len(test_ids))
+    }
+
+
+@contextmanager
+def verification_snapshot(project_dir: Path):
+    """
+    Materialize the current working tree state in a temporary directory.
+
+    For git repositories this is a detached worktree at HEAD with the
+    uncommitted diff applied and untracked files copied in. Other
+    directories are copied. Yields a dict with the snapshot path that
+    corresponds to project_dir; the snapshot is removed on exit.
+    """
+    snapshot_root = Path(tempfile.mkdtemp(prefix="dartai-snapshot-"))
+    repo = get_repo(project_dir)
+    head = repo.head() if repo else None
+    repo_root = repo.root if head else None
+
+    try:
+        if repo_root is not None:
+            worktree = snapshot_root / "tree"
+            added = repo.run(["worktree", "add", "--detach", str(worktree), "HEAD"])
+            if added.returncode != 0:
+                raise RuntimeError(f"git worktree add failed: {added.stderr.strip()}")
+
+            # Staged and unstaged changes to tracked files; the options pin
+            # a patch format git apply accepts whatever the user's diff config
+            diff = repo.output(
+                ["diff", "--binary", "--no-color", "--no-ext-diff", "--no-renames",
+                 "--src-prefix=a/", "--dst-prefix=b/", "HEAD"],
+                text=False
+            )
+            if diff:
+                applied = repo.run(
+                    ["apply", "--binary", "--whitespace=nowarn"],
+                    cwd=worktree, text=False, input=diff
+                )
+                if applied.returncode != 0:
+                    raise RuntimeError(f"git apply failed: {applied.stderr.decode(errors='replace').strip()}")
+
+            untracked = repo.output(["ls-files", "--others", "--exclude-standard", "-z"]) or ""
+            for rel_path in filter(None, untracked.split("\0")):
+                target = worktree / rel_path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(repo_root / rel_path, target)
+
+            snapshot_dir = worktree / project_dir.resolve().relative_to(repo_root.resolve())
+            source = {"kind": "git-worktree", "head": head}
+        else:
+            snapshot_dir = snapshot_root / "tree"
+            shutil.copytree(
+                project_dir, snapshot_dir, symlinks=True,
+                ignore=shutil.ignore_patterns(".git", *SNAPSHOT_LINKED_DIRS)
+            )
+            source = {"kind": "copy"}
+
+        for name in SNAPSHOT_LINKED_DIRS:
+            original = project_dir / name
+            linked = snapshot_dir / name
+            if original.is_dir() and not linked.exists():
+                linked.symlink_to(original.resolve(), target_is_directory=True)
+
+        yield {"path": snapshot_dir, **source}
+
+    finally:
+        if repo_root is not None:
+            repo.run(["worktree", "remove", "--force", str(snapshot_root / "tree")])
+        shutil.rmtree(snapshot_root, ignore_errors=True)
+        if repo_root is not None:
+            repo.run(["worktree", "prune"])
+
+
+def tree_fingerprint(project_dir: Path) -> str:
+    """
+    Fingerprint the current tree state.
+
+    In git repositories this hashes HEAD plus the stat of every path git
+    reports as changed or untracked; elsewhere it hashes the stat of every
+    file. dartai's own state files are ignored so writing results does not
+    change the fingerprint.
+    """
+    digest = hashlib.sha256()
+    repo = get_repo(project_dir)
+    head = repo.head() if repo else None
+    status = repo.output(["status", "--porcelain", "-z", "--untracked-files=all", "--", "."],
+                         cwd=project_dir) if head else None
+
+    if status is not None:
+        toplevel = repo.root
+        digest.update(head.encode())
+        entries = iter(status.split("\0"))
+        paths = []
+        for entry in entries:
+            if not entry:
+                continue
+            paths.append(entry[3:])
+            if entry[0] in "RC":
+                # Renames and copies are followed by their origin path
+                paths.append(next(entries, ""))
+        candidates = [toplevel / rel_path for rel_path in sorted(paths)]
+    else:
+        candidates = sorted(path for path in project_dir.rglob("*") if path.is_file())
+
+    for path in candidates:
+        if path.parent.name == ".claude" and path.name.startswith("dartai-"):
+            continue
+        if any(part in FINGERPRINT_IGNORED_DIRS for part in path.parts):
+            continue
+        try:
+            stat = path.stat()
+            digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\0".encode())
+        except OSError:
+            digest.update(f"{path}\0missing\0".encode())
+
+    return digest.hexdigest()
+
+
+def load_watch_results(project_dir: Path, checks: list) -> Optional[dict]:
+    """
+    Return published watch results for the checks they cover, if they match the current tree.
+
+    The covered checks are listed under "precomputed"; checks the watcher
+    does not run are left for the caller.
+    """
+    results_path = project_dir / WATCH_RESULTS_FILE
+    if not results_path.exists():
+        return None
+
+    try:
+        with open(results_path) as f:
+            published = json.load(f)
+    except Exception:
+        return None
+
+    covered = [c for c in checks if c in published.get("checks", [])]
+    if not covered:
+        return None
+    if published.get("fingerprint") != tree_fingerprint(project_dir):
+        return None
+
+    results = published["results"]
+    results["results"] = [r for r in results.get("results", [])
+                          if r.get("type") in {CHECK_TYPES[c] for c in covered if c in CHECK_TYPES}]
+    results["overall_passed"] = all(r["passed"] for r in results["results"])
+    results["precomputed"] = {
+        "fingerprint": published["fingerprint"],
+        "completed_at": published.get("completed_at"),
+        "checks": covered
+    }
+    return results
+
+
+def publish_watch_results(project_dir: Path, fingerprint: str, checks: list, results: dict):
+    """Atomically publish watch results for check_quality to pick up."""
+    results_path = project_dir / WATCH_RESULTS_FILE
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = results_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "fingerprint": fingerprint,
+            "checks": checks,
+            "completed_at": datetime.now().isoformat(),
+            "results": results
+        }, f)
+    os.replace(tmp_path, results_path)
+
+
+def check_quality(project_dir: str, checks: Optional[list] = None,
+                  shards: int = 0, snapshot: bool = False,
+                  rerun_failed: bool = False, use_watch_results: bool = True) -> dict:
+    """
+    Run quality checks on the project.
+
+    With snapshot=True the checks run against a temporary copy of the
+    current tree, so edits made while they run do not affect the results.
+    When a watcher has already published results for the current tree,
+    the checks they cover are taken from them and only the rest are run.
+    """
     project_path = Path(project_dir)
 
     if not project_path.exists():
@@ -248,7 +843,38 @@ def check_quality(project_dir: str, checks: Optional[list] = None) -> dict:
             "error": "Could not detect project type"
         }
 
-    checks_to_run = checks or ["lint", "test"]
+    checks = checks or DEFAULT_CHECKS
+    precomputed = load_watch_results(project_path, checks) if use_watch_results else None
+    if precomputed is not None:
+        checks = [c for c in checks if c not in precomputed["precomputed"]["checks"]]
+        if not checks:
+            return precomputed
+
+    if snapshot:
+        with verification_snapshot(project_path) as snap:
+            results = run_checks(snap["path"], project_info, checks, shards,
+                                 state_dir=project_path, rerun_failed=rerun_failed)
+        results["project_dir"] = str(project_path)
+        results["snapshot"] = {k: str(v) for k, v in snap.items()}
+    else:
+        results = run_checks(project_path, project_info, checks, shards, rerun_failed=rerun_failed)
+
+    if precomputed is not None:
+        order = list(CHECK_TYPES.values())
+        results["results"] = sorted(
+            precomputed["results"] + results["results"],
+            key=lambda r: order.index(r["type"]) if r.get("type") in order else len(order)
+        )
+        results["overall_passed"] = all(r["passed"] for r in results["results"])
+        results["precomputed"] = precomputed["precomputed"]
+    return results
+
+
+def run_checks(project_path: Path, project_info: dict, checks: Optional[list] = None,
+               shards: int = 0, state_dir: Optional[Path] = None,
+               rerun_failed: bool = False) -> dict:
+    """Run the requested checks in project_path."""
+    checks_to_run = checks or DEFAULT_CHECKS
     results = {
         "project_dir": str(project_path),
         "project_type": project_info,
@@ -263,27 +889,149 @@ def check_quality(project_dir: str, checks: Optional[list] = None) -> dict:
             results["overall_passed"] = False
 
     if "test" in checks_to_run:
-        test_results = run_tests(project_path, project_info["primary"])
+        test_results = run_tests(project_path, project_info["primary"], shards,
+                                 state_dir, rerun_failed)
         results["results"].append(test_results)
         if not test_results["passed"]:
             results["overall_passed"] = False
 
+    results["resource_summary"] = summarize_resources(results["results"])
     return results
 
 
+def summarize_resources(check_results: list) -> dict:
+    """Build a per-check resource table plus totals across all checks."""
+    rows = []
+    for result in check_results:
+        for check in result.get("checks", []):
+            rows.append({
+                "type": result["type"],
+                "tool": check["tool"],
+                **check.get("resources", {})
+            })
+
+    totals = {"wall_seconds": round(sum(r.get("wall_seconds", 0) for r in rows), 3)}
+    measured = [r for r in rows if "user_cpu_seconds" in r]
+    if measured:
+        totals["user_cpu_seconds"] = round(sum(r["user_cpu_seconds"] for r in measured), 3)
+        totals["sys_cpu_seconds"] = round(sum(r["sys_cpu_seconds"] for r in measured), 3)
+        totals["max_rss_mb"] = max(r["max_rss_mb"] for r in measured)
+
+    return {"checks": rows, "totals": totals}
+
+
+def watch_quality(project_dir: str, checks: Optional[list] = None,
+                  interval: float = 1.0, debounce: float = 2.0,
+                  shards: int = 0, snapshot: bool = False):
+    """
+    Re-run checks in the background whenever the tree changes.
+
+    Changes are debounced until the tree has been stable for `debounce`
+    seconds. Each run is published to WATCH_RESULTS_FILE tagged with the
+    fingerprint of the tree it started from.
+    """
+    project_path = Path(project_dir)
+    checks_to_run = checks or ["lint"]
+    published = None
+
+    results_path = project_path / WATCH_RESULTS_FILE
+    if results_path.exists():
+        try:
+            with open(results_path) as f:
+                previous = json.load(f)
+            if previous.get("checks") == checks_to_run:
+                published = previous.get("fingerprint")
+        except Exception:
+            pass
+
+    while True:
+        fingerprint = tree_fingerprint(project_path)
+
+        if fingerprint != published:
+            stable_since = time.monotonic()
+            while time.monotonic() - stable_since < debounce:
+                time.sleep(interval)
+                current = tree_fingerprint(project_path)
+                if current != fingerprint:
+                    fingerprint = current
+                    stable_since = time.monotonic()
+
+            results = check_quality(
+                project_dir, checks_to_run,
+                shards=shards, snapshot=snapshot, use_watch_results=False
+            )
+            publish_watch_results(project_path, fingerprint, checks_to_run, results)
+            published = fingerprint
+
+            print(json.dumps({
+                "published": str(results_path),
+                "fingerprint": fingerprint,
+                "overall_passed": results.get("overall_passed", False),
+                "stale": tree_fingerprint(project_path) != fingerprint
+            }), flush=True)
+
+        time.sleep(interval)
+
+
+def parse_args(argv: list) -> tuple:
+    """Split CLI arguments into positional arguments and --option values."""
+    positional = []
+    options = {}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith("--"):
+            name = arg[2:]
+            if "=" in name:
+                name, value = name.split("=", 1)
+                options[name] = value
+            elif name in VALUE_OPTIONS and i + 1 < len(argv):
+                options[name] = argv[i + 1]
+                i += 1
+            else:
+                options[name] = True
+        else:
+            positional.append(arg)
+        i += 1
+    return positional, options
+
+
 def main():
     """CLI interface for quality checker."""
-    if len(sys.argv) < 2:
+    positional, options = parse_args(sys.argv[1:])
+
+    if not positional:
         print(json.dumps({
-            "error": "Usage: quality_checker.py <project_dir> [checks...]"
+            "error": "Usage: quality_checker.py <project_dir> [checks...] [--shards N] [--snapshot] [--rerun-failed] [--no-cache]",
+            "watch": "quality_checker.py watch <project_dir> [checks...] [--interval S] [--debounce S]"
         }))
         sys.exit(1)
 
-    project_dir = sys.argv[1]
-    checks = sys.argv[2:] if len(sys.argv) > 2 else None
+    if positional[0] == "watch" and len(positional) > 1:
+        try:
+            watch_quality(
+                positional[1], positional[2:] or None,
+                interval=float(options.get("interval", 1.0)),
+                debounce=float(options.get("debounce", 2.0)),
+                shards=int(options.get("shards", 0)),
+                snapshot=bool(options.get("snapshot"))
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
+    project_dir = positional[0]
+    checks = positional[1:] or None
 
     try:
-        result = check_quality(project_dir, checks)
+        shards = int(options.get("shards", 0))
+        result = check_quality(
+            project_dir, checks,
+            shards=shards,
+            snapshot=bool(options.get("snapshot")),
+            rerun_failed=bool(options.get("rerun-failed")),
+            use_watch_results=not options.get("no-cache")
+        )
         print(json.dumps(result, indent=2))
 
         if not result.get("overall_passed", False):
@@ -11,6 +11,8 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+import event_store
+
 STATE_DIR = Path.home() / ".dartai"
 
 
@@ -40,6 +42,8 @@ def cleanup_session():
                 pass
 
         session_data["ended_at"] = datetime.now().isoformat()
+        if session_data.get("telemetry_id"):
+            event_store.end_session(session_data["telemetry_id"], session_data["ended_at"])
         history["sessions"].append(session_data)
 
         # Keep only last 20 sessions
@@ -12,28 +12,11 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-STATE_DIR = Path.home() / ".dartai"
-CONFIG_DIR = Path(".claude")
-CONFIG_FILE = CONFIG_DIR / "dartai.local.md"
-
-
-def parse_project_config():
-    """Parse the project's dartai config file for dartboard settings."""
-    if not CONFIG_FILE.exists():
-        return {}
+import change_journal
+import event_store
+from project_config import read_config
 
-    text = CONFIG_FILE.read_text()
-
-    # Check for YAML frontmatter (between --- markers)
-    if text.startswith("---"):
-        parts = text.split("---", 2)
-        if len(parts) >= 3:
-            try:
-                import yaml
-                return yaml.safe_load(parts[1]) or {}
-            except Exception:
-                pass
-    return {}
+STATE_DIR = Path.home() / ".dartai"
 
 
 def init_session():
@@ -42,7 +25,7 @@ def init_session():
     STATE_DIR.mkdir(parents=True, exist_ok=True)
 
     # Load project config for dartboard settings
-    project_config = parse_project_config()
+    project_config = read_config()["frontmatter"]
     last_dartboard = project_config.get("last_dartboard")
     default_dartboard = project_config.get("default_dartboard")
 
@@ -57,14 +40,16 @@ def init_session():
         "active_dartboard": last_dartboard or default_dartboard
     }
 
+    session_data["telemetry_id"] = event_store.insert(
+        "sessions", started_at=session_data["started_at"], working_dir=session_data["working_dir"],
+        dartboard=session_data["active_dartboard"]
+    )
+
     with open(session_file, "w") as f:
         json.dump(session_data, f, indent=2)
 
-    # Initialize tracked changes file if not exists
-    changes_file = STATE_DIR / "tracked_changes.json"
-    if not changes_file.exists():
-        with open(changes_file, "w") as f:
-            json.dump({"changes": []}, f)
+    # Move changes tracked before the journal existed into it
+    change_journal.migrate_legacy()
 
     result = {
         "success": True,
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+State Store - Contention-safe JSON state files for dartai hooks.
+
+Hooks for parallel subagents fire concurrently, so state files are never
+rewritten in place. Documents are updated under a per-file flock and
+replaced atomically via a temp file and rename, so readers never see a
+torn file and concurrent increments are never lost. The document is the
+only copy of its counters, so resetting or rewriting it resets them too.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Lock files live outside the project so they never show up in git status
+LOCK_DIR = Path.home() / ".dartai" / "locks"
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Serialize read-modify-write cycles on a file across processes."""
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha1(str(path.resolve()).encode()).hexdigest()
+    lock_path = LOCK_DIR / f"{path.name}-{key}.lock"
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_atomic(path: Path, content: str):
+    """Write a file via a temp file and rename so readers never see a partial write."""
+    # A per-process name instead of tempfile.mkstemp keeps hook imports light
+    tmp_path = path.parent / f".{path.name}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_document(path: Path) -> dict:
+    """Read a JSON document, or an empty one when missing or unreadable."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def update_document(path: Path, mutate: Callable[[dict], Optional[dict]]) -> dict:
+    """
+    Apply mutate to a document under its lock and replace it atomically.
+
+    mutate changes the dict in place or returns a new one. Returns the
+    document as written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        doc = read_document(path)
+        result = mutate(doc)
+        doc = doc if result is None else result
+        write_atomic(path, json.dumps(doc, indent=2))
+    return doc
+
+
+def increment(path: Path, counter: str, amount: int = 1, fields: Optional[dict] = None) -> dict:
+    """Add to a counter and merge fields into the document; returns the updated document."""
+    def add(doc):
+        current = doc.get(counter)
+        doc[counter] = (current if isinstance(current, int) else 0) + amount
+        doc.update(fields or {})
+
+    return update_document(path, add)
+
+
+def reset(path: Path):
+    """Remove a document."""
+    path = Path(path)
+    with file_lock(path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    """CLI interface for inspecting and resetting hook state files."""
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage: state_store.py <command> <file>",
+            "commands": ["show", "reset"]
+        }))
+        sys.exit(1)
+
+    command, path = sys.argv[1], Path(sys.argv[2])
+
+    try:
+        if command == "show":
+            result = {"document": read_document(path)}
+        elif command == "reset":
+            reset(path)
+            result = {"success": True, "reset": str(path)}
+        else:
+            result = {"error": f"Unknown command: {command}"}
+        print(json.dumps(result, indent=2))
+
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
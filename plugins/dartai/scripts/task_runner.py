@@ -8,15 +8,131 @@ from a Dart dartboard and processing them through the quality pipeline.
 
 import json
 import os
+import queue
+import re
+import socket
+import subprocess
 import sys
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
+from urllib.error import URLError
+from urllib.request import Request, urlopen
 
-# State file for tracking loop status
+from state_store import file_lock, write_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# State file for tracking loop status (snapshot of the event log)
 STATE_FILE = Path.home() / ".dartai" / "loop_state.json"
-CHANGES_FILE = Path.home() / ".dartai" / "tracked_changes.json"
+CHANGES_FILE = Path.home() / ".dartai" / "changes" / "changes.ndjson"
+
+# Append-only event log; events after the snapshot live here
+EVENTS_FILE = Path.home() / ".dartai" / "loop_events.log"
+# Compacted event segments, one file per snapshot interval
+SEGMENTS_DIR = Path.home() / ".dartai" / "loop_events"
+LOCK_FILE = Path.home() / ".dartai" / "loop_state.lock"
+
+# Unix socket served by `task_runner.py serve`
+SOCKET_FILE = Path.home() / ".dartai" / "task_runner.sock"
+# Client-side timeout when talking to the daemon, in seconds
+SOCKET_TIMEOUT = 10
+
+# Events appended before the state is snapshotted and the log compacted
+SNAPSHOT_INTERVAL = 50
+
+# Execution slot leases expire after this long without a heartbeat
+LEASE_SECONDS = 30 * 60
+
+# A task whose lease expires this many times is failed instead of requeued
+LEASE_MAX_EXPIRIES = 2
+
+# How often the daemon, or status/set-task calls without one, check for
+# expired leases, in seconds
+WATCHDOG_INTERVAL = 30
+# Touched whenever leases are checked outside the daemon
+WATCHDOG_STAMP_FILE = Path.home() / ".dartai" / "watchdog.stamp"
+
+# Commands that run the watchdog when no daemon is serving
+WATCHDOG_COMMANDS = ["status", "set-task", "set-batch"]
+
+# Task fields that may list the ids a task depends on
+DEPENDENCY_FIELDS = ["depends_on", "dependencies", "blocked_by", "blockedBy", "blockers"]
+
+# Dart statuses that count as done for dependency purposes
+DONE_STATUSES = {"done", "completed", "complete", "cancelled", "canceled"}
+
+# Dart statuses that keep a task out of the ready set
+NOT_READY_STATUSES = {"blocked", "in progress", "doing"}
+
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+# Governor: token bucket for tool calls shared by all executors
+GOVERNOR_FILE = Path.home() / ".dartai" / "governor.json"
+TOOL_CALL_RATE = 2.0  # tokens refilled per second
+TOOL_CALL_BURST = 60
+# Tokens that must be available before another executor is admitted
+EXECUTOR_ADMIT_TOKENS = 10
+# New executors wait while the 1-minute load average per CPU is above this
+MAX_LOAD_PER_CPU = 1.5
+# Executors allowed in the verify phase (running test suites) at once
+MAX_CONCURRENT_VERIFICATIONS = 1
+# Seconds a caller held back by the governor should wait before retrying
+GOVERNOR_RETRY_SECONDS = 15
+
+# Tags that mark a task as trivial enough to batch with others
+MICRO_TASK_TAGS = {"typo", "docs", "documentation", "config", "chore", "trivial", "micro"}
+# Tasks expected to take at most this long are batched too, in seconds
+MICRO_TASK_SECONDS = 5 * 60
+# Limits on one batch: tasks and total expected seconds
+BATCH_MAX_TASKS = 5
+BATCH_MAX_SECONDS = 20 * 60
+
+# Ready-set orderings offered by the schedule command; the first is the default
+SCHEDULE_POLICIES = ["critical-path", "sjf", "fifo"]
+
+# Expected task duration before any history exists, in seconds
+DEFAULT_TASK_SECONDS = 15 * 60
+
+# Finished tasks a tag, title keyword or dartboard needs before its estimate is used
+ESTIMATE_MIN_SAMPLES = 2
+# Most recent durations kept per estimate key in the snapshot
+ESTIMATE_MAX_SAMPLES = 50
+
+# Completed task ids kept in the snapshot to answer repeated completions
+FINISHED_LIMIT = 200
+
+# Title words too common to say anything about a task's duration
+ESTIMATE_STOPWORDS = {"the", "and", "for", "with", "from", "into", "when", "that", "this", "use", "all"}
+
+# Phases a task moves through; set-task starts "execute"
+TASK_PHASES = ["execute", "verify", "docs"]
+
+# SLOP server used to prefetch the next task's details
+SLOP_URL = os.environ.get("SLOP_URL", "http://localhost:8080")
+SLOP_TIMEOUT = 10
+
+# Warmed context for the next ready task, one JSON file per task
+PREFETCH_DIR = Path.home() / ".dartai" / "prefetch"
+# Prefetches not taken within this many seconds are evicted
+PREFETCH_TTL = 30 * 60
+# Referenced files larger than this are located but not read ahead
+PREFETCH_MAX_FILE_BYTES = 1024 * 1024
+
+# Prometheus textfile export for node_exporter's textfile collector
+METRICS_FILE = Path.home() / ".dartai" / "metrics" / "dartai_loop.prom"
+
+# Sliding windows reported by the metrics command
+METRICS_WINDOWS = {"1h": 3600, "24h": 86400, "7d": 7 * 86400}
+
+# Loop runs kept in the snapshot; the full history stays in the segments
+HISTORY_LIMIT = 10
 
 
 def ensure_state_dir():
@@ -24,163 +140,981 @@ def ensure_state_dir():
     STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 
-def load_state() -> dict:
-    """Load the current loop state."""
-    if STATE_FILE.exists():
-        with open(STATE_FILE) as f:
-            return json.load(f)
+def initial_state() -> dict:
+    """Get the state before any events."""
     return {
         "running": False,
         "dartboard": None,
         "current_task": None,
+        "slots": 1,
+        "in_flight": {},
+        "requeued": [],
+        "lease_expiries": {},
+        "finished": {},
+        "backlog": [],
+        "waiting": {},
+        "estimate_samples": {},
         "tasks_completed": 0,
         "tasks_failed": 0,
         "started_at": None,
         "last_activity": None,
         "failure_mode": "stop",
-        "history": []
+        "history": [],
+        "event_seq": 0,
+        "snapshot_seq": 0
     }
 
 
-def save_state(state: dict):
-    """Save the current loop state."""
-    ensure_state_dir()
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2, default=str)
+def lease_expiry(ts: str, lease_seconds: int) -> str:
+    """Get the ISO timestamp a lease renewed at ts expires at."""
+    return datetime.fromtimestamp(datetime.fromisoformat(ts).timestamp() + lease_seconds).isoformat()
 
 
-def start_loop(dartboard: str, failure_mode: str = "stop") -> dict:
-    """Start the task execution loop."""
-    state = load_state()
+def record_failure(state: dict, task_id: str, reason: str, ts: str):
+    """Count a failed task and stop the loop when failure_mode is "stop"."""
+    state["tasks_failed"] += 1
 
-    if state["running"]:
-        return {
-            "success": False,
-            "error": "Loop already running",
-            "dartboard": state["dartboard"]
+    # Check failure mode
+    if state["failure_mode"] == "stop":
+        state["running"] = False
+        state["history"].append({
+            "dartboard": state["dartboard"],
+            "started_at": state["started_at"],
+            "stopped_at": ts,
+            "tasks_completed": state["tasks_completed"],
+            "tasks_failed": state["tasks_failed"],
+            "stop_reason": f"{reason}: {task_id}"
+        })
+
+
+def release_task(state: dict, task_id: str) -> Optional[dict]:
+    """Remove a task from in_flight and return it."""
+    task = state["in_flight"].pop(task_id, None)
+    # current_task tracks the most recently started task still in flight
+    in_flight = sorted(state["in_flight"].values(), key=lambda t: t["started_at"])
+    state["current_task"] = in_flight[-1] if in_flight else None
+    return task
+
+
+def batch_members(state: dict, task_or_batch_id: str) -> list:
+    """Get the in-flight tasks sharing an executor with a task, or in a batch."""
+    task = state["in_flight"].get(task_or_batch_id)
+    batch = task.get("batch") if task else task_or_batch_id
+    if task and not batch:
+        return [task]
+    return [t for t in state["in_flight"].values() if t.get("batch") == batch]
+
+
+def record_estimate_sample(state: dict, task: dict, ts: str):
+    """Fold a finished task's duration into the estimate samples kept in the state."""
+    seconds = (datetime.fromisoformat(ts) - datetime.fromisoformat(task["started_at"])).total_seconds()
+    samples = state.setdefault("estimate_samples", {})
+    for key in estimate_keys(task["title"], task.get("tags", []), state["dartboard"]):
+        values = samples.setdefault(key, [])
+        values.append(round(seconds / task.get("batch_size", 1), 1))
+        del values[:-ESTIMATE_MAX_SAMPLES]
+
+
+def drop_from_backlog(state: dict, task_id: str):
+    """Remove a finished task from the known backlog."""
+    state["backlog"] = [t for t in state.get("backlog", []) if t["id"] != task_id]
+
+
+def apply_event(state: dict, event: dict, history_limit: Optional[int] = HISTORY_LIMIT) -> dict:
+    """Apply one event to the state. Pure except for mutating state."""
+    event_type = event["type"]
+    ts = event["ts"]
+
+    if event_type == "start":
+        state.update({
+            "running": True,
+            "dartboard": event["dartboard"],
+            "current_task": None,
+            "slots": event.get("slots", 1),
+            "in_flight": {},
+            "requeued": [],
+            "lease_expiries": {},
+            "finished": {},
+            "backlog": [],
+            "waiting": {},
+            "started_at": ts,
+            "failure_mode": event["failure_mode"],
+            "tasks_completed": 0,
+            "tasks_failed": 0
+        })
+
+    elif event_type == "stop":
+        state["history"].append({
+            "dartboard": state["dartboard"],
+            "started_at": state["started_at"],
+            "stopped_at": ts,
+            "tasks_completed": state["tasks_completed"],
+            "tasks_failed": state["tasks_failed"],
+            "stop_reason": event["reason"]
+        })
+        state["running"] = False
+        state["current_task"] = None
+        state["in_flight"] = {}
+        state["waiting"] = {}
+
+    elif event_type == "wait":
+        waiting = state.setdefault("waiting", {})
+        waiting[event["task_id"]] = {
+            "kind": event["kind"],
+            "reason": event["reason"],
+            "since": waiting.get(event["task_id"], {}).get("since", ts)
         }
 
-    state.update({
-        "running": True,
-        "dartboard": dartboard,
-        "current_task": None,
-        "started_at": datetime.now().isoformat(),
-        "last_activity": datetime.now().isoformat(),
-        "failure_mode": failure_mode,
-        "tasks_completed": 0,
-        "tasks_failed": 0
-    })
+    elif event_type == "set_task":
+        task = {
+            "id": event["task_id"],
+            "title": event["task_title"],
+            "slot": event.get("slot", 0),
+            "started_at": ts,
+            "phase": "execute",
+            "phase_started_at": ts,
+            "lease_expires_at": lease_expiry(ts, event.get("lease_seconds", LEASE_SECONDS)),
+            "estimated_seconds": event.get("estimated_seconds"),
+            "tags": event.get("tags", [])
+        }
+        if event.get("batch"):
+            task["batch"] = event["batch"]
+            task["batch_size"] = event["batch_size"]
+        state["in_flight"][task["id"]] = task
+        state["current_task"] = task
+        state.get("waiting", {}).pop(task["id"], None)
+        if event.get("batch"):
+            state.get("waiting", {}).pop(event["batch"], None)
+        state["requeued"] = [t for t in state.get("requeued", []) if t["id"] != task["id"]]
+        # Starting a task again begins a new attempt that can be completed
+        state.get("finished", {}).pop(task["id"], None)
+
+    elif event_type == "phase":
+        tasks = [state["in_flight"][event["task_id"]]] if event["task_id"] in state["in_flight"] \
+            else batch_members(state, event["task_id"])
+        if event["phase"] == "verify":
+            state.get("waiting", {}).pop(event["task_id"], None)
+        for task in tasks:
+            task["phase"] = event["phase"]
+            task["phase_started_at"] = ts
+            # A phase change proves the executor is alive
+            if "lease_seconds" in event:
+                task["lease_expires_at"] = lease_expiry(ts, event["lease_seconds"])
+
+    elif event_type == "heartbeat":
+        # A batch shares one executor, so a heartbeat renews every member
+        for task in batch_members(state, event["task_id"]):
+            task["lease_expires_at"] = lease_expiry(ts, event["lease_seconds"])
+            task["last_heartbeat"] = ts
+
+    elif event_type == "lease_expired":
+        task = release_task(state, event["task_id"])
+        expiries = state.setdefault("lease_expiries", {})
+        expiries[event["task_id"]] = expiries.get(event["task_id"], 0) + 1
+        if event["action"] == "requeue":
+            state.setdefault("requeued", []).append({
+                "id": event["task_id"],
+                "title": task["title"] if task else "",
+                "expired_at": ts,
+                "expiries": expiries[event["task_id"]]
+            })
+        else:
+            record_failure(state, event["task_id"], "lease_expired", ts)
+            drop_from_backlog(state, event["task_id"])
+
+    elif event_type == "complete_task":
+        if event["success"]:
+            state["tasks_completed"] += 1
+            if event["task_id"] in state["in_flight"]:
+                record_estimate_sample(state, state["in_flight"][event["task_id"]], ts)
+        else:
+            record_failure(state, event["task_id"], "task_failure", ts)
+
+        release_task(state, event["task_id"])
+        drop_from_backlog(state, event["task_id"])
+        state.get("waiting", {}).pop(event["task_id"], None)
+        # A late completion after a requeue settles the task
+        state["requeued"] = [t for t in state.get("requeued", []) if t["id"] != event["task_id"]]
+        finished = state.setdefault("finished", {})
+        finished.pop(event["task_id"], None)
+        finished[event["task_id"]] = event["success"]
+        # Only recent completions can be repeated; keep the snapshot bounded
+        for task_id in list(finished)[:-FINISHED_LIMIT]:
+            del finished[task_id]
+
+    elif event_type == "backlog":
+        state["backlog"] = event["tasks"]
+
+    if history_limit is not None:
+        state["history"] = state["history"][-history_limit:]
+
+    state["last_activity"] = ts
+    state["event_seq"] = event["seq"]
+    return state
 
+
+# Set while running as a daemon: the in-memory state and the writer queue.
+# The daemon holds the state lock for its whole lifetime.
+_resident = None
+
+
+@contextmanager
+def state_lock():
+    """Hold the exclusive state lock across a load/append cycle."""
+    if _resident is not None:
+        # The daemon already owns the lock and serializes requests
+        yield
+        return
+
+    ensure_state_dir()
+    with open(LOCK_FILE, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_events(path: Path, after_seq: int = 0):
+    """Yield events from an event log file with seq greater than after_seq."""
+    if not path.exists():
+        return
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn final line from a crashed writer
+                continue
+            if event["seq"] > after_seq:
+                yield event
+
+
+def load_state() -> dict:
+    """Load the current loop state from the snapshot plus the log tail."""
+    if _resident is not None:
+        return _resident["state"]
+
+    state = initial_state()
+    if STATE_FILE.exists():
+        with open(STATE_FILE) as f:
+            state.update(json.load(f))
+
+    for event in read_events(EVENTS_FILE, state["event_seq"]):
+        apply_event(state, event)
+
+    return state
+
+
+def save_state(state: dict):
+    """Save a state snapshot atomically."""
+    ensure_state_dir()
+    tmp_path = STATE_FILE.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, separators=(",", ":"), default=str)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def compact_events(state: dict):
+    """Snapshot the state and move the current log into a compacted segment."""
+    state["snapshot_seq"] = state["event_seq"]
     save_state(state)
+    if EVENTS_FILE.exists():
+        SEGMENTS_DIR.mkdir(parents=True, exist_ok=True)
+        os.replace(EVENTS_FILE, SEGMENTS_DIR / f"events-{state['event_seq']:012d}.log")
+
+
+def append_event(state: dict, event_type: str, **payload) -> dict:
+    """
+    Append an event to the log and apply it to state.
+
+    The caller must hold state_lock and pass the state it loaded under it.
+    """
+    event = {
+        "seq": state["event_seq"] + 1,
+        "ts": datetime.now().isoformat(),
+        "type": event_type,
+        **payload
+    }
+
+    line = json.dumps(event, separators=(",", ":"), default=str) + "\n"
+    if _resident is not None:
+        _resident["writes"].put(("event", line))
+    else:
+        with open(EVENTS_FILE, "a") as f:
+            f.write(line)
+
+    apply_event(state, event)
+
+    if state["event_seq"] - state["snapshot_seq"] >= SNAPSHOT_INTERVAL:
+        if _resident is not None:
+            state["snapshot_seq"] = state["event_seq"]
+            # Serialize now so the writer snapshots exactly this state
+            _resident["writes"].put(("compact", json.loads(json.dumps(state, default=str))))
+        else:
+            compact_events(state)
+
+    return state
+
+
+def start_loop(dartboard: str, failure_mode: str = "stop", slots: int = 1) -> dict:
+    """Start the task execution loop with the given number of execution slots."""
+    with state_lock():
+        state = load_state()
+
+        if state["running"]:
+            return {
+                "success": False,
+                "error": "Loop already running",
+                "dartboard": state["dartboard"]
+            }
+
+        if slots < 1:
+            return {
+                "success": False,
+                "error": "At least one execution slot required"
+            }
+
+        append_event(state, "start", dartboard=dartboard, failure_mode=failure_mode, slots=slots)
 
     return {
         "success": True,
         "message": f"Loop started for dartboard: {dartboard}",
-        "failure_mode": failure_mode
+        "failure_mode": failure_mode,
+        "slots": slots
     }
 
 
 def stop_loop(reason: str = "user_request") -> dict:
     """Stop the task execution loop."""
-    state = load_state()
+    with state_lock():
+        state = load_state()
 
-    if not state["running"]:
-        return {
-            "success": False,
-            "error": "Loop not running"
-        }
+        if not state["running"]:
+            return {
+                "success": False,
+                "error": "Loop not running"
+            }
 
-    # Add to history
-    state["history"].append({
-        "dartboard": state["dartboard"],
-        "started_at": state["started_at"],
-        "stopped_at": datetime.now().isoformat(),
+        append_event(state, "stop", reason=reason)
+
+    return {
+        "success": True,
+        "message": "Loop stopped",
+        "reason": reason,
         "tasks_completed": state["tasks_completed"],
-        "tasks_failed": state["tasks_failed"],
-        "stop_reason": reason
-    })
+        "tasks_failed": state["tasks_failed"]
+    }
 
-    # Keep only last 10 history entries
-    state["history"] = state["history"][-10:]
 
-    state.update({
-        "running": False,
-        "current_task": None,
-        "last_activity": datetime.now().isoformat()
-    })
+def set_current_task(task_id: str, task_title: str, slot: Optional[int] = None,
+                     project_dir: Optional[Path] = None) -> dict:
+    """
+    Claim an execution slot for a task.
 
-    save_state(state)
+    Uses the given slot, or the lowest free one. Fails when the task is
+    already in flight or every slot is busy. Starts prefetching the next
+    ready task in the background and returns this task's prefetched
+    context, if any.
+    """
+    with state_lock():
+        state = load_state()
+
+        if not state["running"]:
+            return {
+                "success": False,
+                "error": "Loop not running"
+            }
+
+        if task_id in state["in_flight"]:
+            return {
+                "success": False,
+                "error": f"Task already in flight: {task_id}",
+                "slot": state["in_flight"][task_id]["slot"]
+            }
+
+        slot, error = claim_slot(state, slot)
+        if error:
+            return error
+
+        held = hold_back(state, task_id, "executor")
+        if held:
+            return held
+
+        queued = next((t for t in state.get("backlog", []) if t["id"] == task_id), None)
+        if queued:
+            tags, estimate = queued.get("tags", []), queued["estimated_seconds"]
+        else:
+            tags = []
+            estimate, _ = estimate_duration(task_title, tags, state["dartboard"],
+                                          learn_estimates(state=state))
+
+        append_event(state, "set_task", task_id=task_id, task_title=task_title,
+                     slot=slot, lease_seconds=LEASE_SECONDS, tags=tags,
+                     estimated_seconds=estimate)
+
+    next_task = next_ready_task(state)
 
     return {
         "success": True,
-        "message": "Loop stopped",
+        "task_id": task_id,
+        "task_title": task_title,
+        "slot": slot,
+        "lease_expires_at": state["in_flight"][task_id]["lease_expires_at"],
+        "estimated_seconds": state["in_flight"][task_id]["estimated_seconds"],
+        "prefetched": take_prefetch(task_id),
+        "prefetching": start_prefetch(next_task, project_dir or Path.cwd()) if next_task else None
+    }
+
+
+def load_average_per_cpu() -> Optional[float]:
+    """Get the 1-minute load average per CPU, or None where unsupported."""
+    try:
+        return round(os.getloadavg()[0] / (os.cpu_count() or 1), 2)
+    except (AttributeError, OSError):
+        return None
+
+
+def refill_bucket(now: Optional[float] = None) -> dict:
+    """Load the tool-call token bucket, refilled up to the current time."""
+    now = now or time.time()
+    try:
+        bucket = json.loads(GOVERNOR_FILE.read_text())
+    except (OSError, json.JSONDecodeError):
+        bucket = {"tokens": float(TOOL_CALL_BURST), "updated": now}
+    elapsed = max(0.0, now - bucket["updated"])
+    bucket["tokens"] = min(float(TOOL_CALL_BURST), bucket["tokens"] + elapsed * TOOL_CALL_RATE)
+    bucket["updated"] = now
+    return bucket
+
+
+def take_tokens(count: float) -> tuple:
+    """
+    Take tokens from the shared bucket if it holds enough; returns (granted, bucket).
+
+    Only the bucket's own lock is held, never the state lock.
+    """
+    ensure_state_dir()
+    with file_lock(GOVERNOR_FILE):
+        bucket = refill_bucket()
+        granted = bucket["tokens"] >= count
+        if granted:
+            bucket["tokens"] -= count
+        write_atomic(GOVERNOR_FILE, json.dumps(bucket))
+    return granted, bucket
+
+
+def acquire_tokens(count: float = 1) -> dict:
+    """
+    Take tool-call tokens from the shared bucket.
+
+    Never fails: when the bucket is short, nothing is taken and the caller
+    is told how long to wait before retrying.
+    """
+    granted, bucket = take_tokens(count)
+    return {
+        "granted": granted,
+        "tokens": round(bucket["tokens"], 2),
+        "wait_seconds": 0.0 if granted else round((count - bucket["tokens"]) / TOOL_CALL_RATE, 2)
+    }
+
+
+def verifying_executors(state: dict) -> int:
+    """Count executors (slots) currently in the verify phase."""
+    return len({t["slot"] for t in state["in_flight"].values() if t["phase"] == "verify"})
+
+
+def admission_check(state: dict, kind: str) -> Optional[str]:
+    """Get the reason a new executor or verification must wait, or None to admit it."""
+    if kind == "verify":
+        if verifying_executors(state) >= MAX_CONCURRENT_VERIFICATIONS:
+            return f"{MAX_CONCURRENT_VERIFICATIONS} verification(s) already running"
+        return None
+
+    # The first executor is always admitted so the loop makes progress,
+    # but still pays for its tool calls when the bucket can cover them
+    first = not state["in_flight"]
+    load = load_average_per_cpu()
+    if not first and load is not None and load > MAX_LOAD_PER_CPU:
+        return f"load average per CPU {load} above {MAX_LOAD_PER_CPU}"
+    granted, bucket = take_tokens(EXECUTOR_ADMIT_TOKENS)
+    if not granted and not first:
+        return f"tool-call tokens {bucket['tokens']:.1f} below {EXECUTOR_ADMIT_TOKENS}"
+    return None
+
+
+def hold_back(state: dict, task_id: str, kind: str) -> Optional[dict]:
+    """
+    Apply governor backpressure to a task, or return None to let it proceed.
+
+    A held-back task is queued in state["waiting"] and told to retry later;
+    this is not a failure.
+    """
+    reason = admission_check(state, kind)
+    if reason is None:
+        return None
+
+    append_event(state, "wait", task_id=task_id, kind=kind, reason=reason)
+    waiting = sorted(state["waiting"].items(), key=lambda item: item[1]["since"])
+    return {
+        "success": False,
+        "admitted": False,
+        "task_id": task_id,
+        "kind": kind,
         "reason": reason,
-        "tasks_completed": state["tasks_completed"],
-        "tasks_failed": state["tasks_failed"]
+        "retry_after": GOVERNOR_RETRY_SECONDS,
+        "queue_position": [w[0] for w in waiting].index(task_id) + 1,
+        "queue_depth": len(waiting)
     }
 
 
-def set_current_task(task_id: str, task_title: str) -> dict:
-    """Set the current task being processed."""
-    state = load_state()
+def governor_status(state: dict) -> dict:
+    """Summarize governor limits, current pressure and the waiting queue."""
+    waiting = sorted(({"id": task_id, **w} for task_id, w in state.get("waiting", {}).items()),
+                     key=lambda w: w["since"])
+    return {
+        "queue_depth": len(waiting),
+        "waiting": waiting,
+        "tokens": round(refill_bucket()["tokens"], 2),
+        "load_per_cpu": load_average_per_cpu(),
+        "verifying": verifying_executors(state),
+        "limits": {
+            "tool_calls_per_second": TOOL_CALL_RATE,
+            "tool_call_burst": TOOL_CALL_BURST,
+            "executor_admit_tokens": EXECUTOR_ADMIT_TOKENS,
+            "max_load_per_cpu": MAX_LOAD_PER_CPU,
+            "max_concurrent_verifications": MAX_CONCURRENT_VERIFICATIONS
+        }
+    }
 
-    if not state["running"]:
-        return {
+
+def claim_slot(state: dict, slot: Optional[int]) -> tuple:
+    """Pick the given slot or the lowest free one; returns (slot, error result)."""
+    busy = {t["slot"] for t in state["in_flight"].values()}
+    free = [i for i in range(state["slots"]) if i not in busy]
+
+    if slot is None:
+        if not free:
+            return None, {
+                "success": False,
+                "error": "No free execution slot",
+                "slots": state["slots"]
+            }
+        return free[0], None
+    if slot not in free:
+        return None, {
             "success": False,
-            "error": "Loop not running"
+            "error": f"Slot {slot} is not free",
+            "free_slots": free
         }
+    return slot, None
 
-    state["current_task"] = {
-        "id": task_id,
-        "title": task_title,
-        "started_at": datetime.now().isoformat()
-    }
-    state["last_activity"] = datetime.now().isoformat()
 
-    save_state(state)
+def next_ready_task(state: dict) -> Optional[str]:
+    """Get the first ready backlog task that is not in flight."""
+    return next((t["id"] for t in state.get("backlog", [])
+                 if t.get("ready") and t["id"] not in state["in_flight"]), None)
+
+
+def set_batch(task_ids: list, slot: Optional[int] = None, project_dir: Optional[Path] = None) -> dict:
+    """
+    Claim one execution slot for a batch of micro-tasks.
+
+    The tasks must be in the backlog recorded by `schedule`. They share one
+    executor, lease and verification run (`phase <batch_id> verify`), but
+    each is completed on its own with complete-task.
+    """
+    with state_lock():
+        state = load_state()
+
+        if not state["running"]:
+            return {
+                "success": False,
+                "error": "Loop not running"
+            }
+
+        backlog = {t["id"]: t for t in state.get("backlog", [])}
+        unknown = [t for t in task_ids if t not in backlog]
+        busy = [t for t in task_ids if t in state["in_flight"]]
+        if unknown or busy or len(set(task_ids)) != len(task_ids):
+            return {
+                "success": False,
+                "error": "Batch tasks must be distinct backlog tasks that are not in flight",
+                "unknown": unknown,
+                "in_flight": busy
+            }
+
+        slot, error = claim_slot(state, slot)
+        if error:
+            return error
+
+        batch_id = f"batch:{task_ids[0]}"
+        held = hold_back(state, batch_id, "executor")
+        if held:
+            return held
+        for task_id in task_ids:
+            queued = backlog[task_id]
+            append_event(state, "set_task", task_id=task_id, task_title=queued.get("title", ""),
+                         slot=slot, lease_seconds=LEASE_SECONDS, tags=queued.get("tags", []),
+                         estimated_seconds=queued["estimated_seconds"],
+                         batch=batch_id, batch_size=len(task_ids))
+
+    next_task = next_ready_task(state)
 
     return {
         "success": True,
+        "batch_id": batch_id,
+        "task_ids": task_ids,
+        "slot": slot,
+        "estimated_seconds": sum(backlog[t]["estimated_seconds"] for t in task_ids),
+        "prefetched": {t: take_prefetch(t) for t in task_ids},
+        "prefetching": start_prefetch(next_task, project_dir or Path.cwd()) if next_task else None
+    }
+
+
+def is_micro_task(tags: list, estimated_seconds: float) -> bool:
+    """Check whether a task is small enough to share an executor."""
+    return bool(MICRO_TASK_TAGS.intersection(tags)) or estimated_seconds <= MICRO_TASK_SECONDS
+
+
+def plan_batches(tasks: list, policy: str = SCHEDULE_POLICIES[0]) -> dict:
+    """
+    Group ready micro-tasks into batches for one executor each.
+
+    Ready tasks keep their schedule order. Any micro-tasks on the same
+    dartboard can share an executor, whatever their micro tags, up to
+    BATCH_MAX_TASKS tasks and BATCH_MAX_SECONDS expected seconds. Each
+    batch lists the kinds it mixes (micro tags, or "small" when only the
+    estimate qualifies). Tagged micro-tasks without any history count as
+    MICRO_TASK_SECONDS. A batch of one task is not batched.
+    """
+    schedule = schedule_tasks(tasks, policy)
+    if "ready" not in schedule:
+        return schedule
+
+    by_id = {str(t["id"]): t for t in tasks if t.get("id")}
+    groups = {}
+    singles = []
+    for item in schedule["ready"]:
+        tags = task_tags(by_id[item["id"]])
+        if not is_micro_task(tags, item["estimated_seconds"]):
+            singles.append(item["id"])
+            continue
+        kind = next((tag for tag in tags if tag in MICRO_TASK_TAGS), "small")
+        item = {**item, "kind": kind}
+        if item["estimate_basis"] == "default":
+            item["estimated_seconds"] = float(MICRO_TASK_SECONDS)
+        batches = groups.setdefault(by_id[item["id"]].get("dartboard") or "", [[]])
+        current = batches[-1]
+        if len(current) >= BATCH_MAX_TASKS or \
+                sum(t["estimated_seconds"] for t in current) + item["estimated_seconds"] > BATCH_MAX_SECONDS:
+            current = []
+            batches.append(current)
+        current.append(item)
+
+    planned = []
+    for dartboard, batches in groups.items():
+        for batch in batches:
+            if len(batch) < 2:
+                singles.extend(t["id"] for t in batch)
+                continue
+            planned.append({
+                "id": f"batch:{batch[0]['id']}",
+                "dartboard": dartboard or None,
+                "kinds": sorted({t["kind"] for t in batch}),
+                "tasks": [{"id": t["id"], "title": t["title"], "estimated_seconds": t["estimated_seconds"]}
+                          for t in batch],
+                "estimated_seconds": round(sum(t["estimated_seconds"] for t in batch), 1)
+            })
+
+    order = [item["id"] for item in schedule["ready"]]
+    return {
+        "policy": policy,
+        "batches": planned,
+        "singles": sorted(singles, key=order.index),
+        "blocked": len(schedule["blocked"])
+    }
+
+
+def slop_call(tool: str, arguments: dict) -> dict:
+    """Call a tool through the SLOP REST API."""
+    request = Request(
+        f"{SLOP_URL.rstrip('/')}/tools",
+        data=json.dumps({"tool": tool, "arguments": arguments}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urlopen(request, timeout=SLOP_TIMEOUT) as response:
+        return json.loads(response.read().decode())
+
+
+def referenced_files(text: str, project_dir: Path) -> list:
+    """Find path-like tokens in text that name files in the project."""
+    files = []
+    for token in sorted(set(re.findall(r"[\w./-]+\.\w+", text or ""))):
+        path = project_dir / token.removeprefix("./")
+        if path.is_file() and path.resolve().is_relative_to(project_dir.resolve()):
+            files.append(path)
+    return files
+
+
+def prefetch_file(task_id: str) -> Path:
+    """Get the prefetch cache file for a task."""
+    return PREFETCH_DIR / f"{re.sub(r'[^A-Za-z0-9_-]', '_', task_id)}.json"
+
+
+def prefetch_task(task_id: str, project_dir: Path) -> dict:
+    """
+    Fetch a task's details from Dart and warm the files it references.
+
+    The result is cached in PREFETCH_DIR until set-task takes it or it is
+    evicted. Referenced files are read once so they are in the page cache.
+    """
+    started = datetime.now()
+    try:
+        response = slop_call("dart-query.get_task", {"id": task_id})
+    except (URLError, OSError, ValueError) as e:
+        return {"success": False, "task_id": task_id, "error": f"SLOP request failed: {e}"}
+    if "error" in response:
+        return {"success": False, "task_id": task_id, "error": response["error"]}
+
+    task = response.get("result", response)
+    if isinstance(task, dict) and isinstance(task.get("item"), dict):
+        task = task["item"]
+    text = task.get("description", "") if isinstance(task, dict) else json.dumps(task)
+
+    files = []
+    for path in referenced_files(text, project_dir):
+        size = path.stat().st_size
+        if size <= PREFETCH_MAX_FILE_BYTES:
+            with open(path, "rb") as f:
+                while f.read(65536):
+                    pass
+        files.append({"path": str(path.relative_to(project_dir)), "size": size})
+
+    context = {
         "task_id": task_id,
-        "task_title": task_title
+        "project_dir": str(project_dir),
+        "fetched_at": datetime.now().isoformat(),
+        "fetch_seconds": round((datetime.now() - started).total_seconds(), 3),
+        "task": task,
+        "files": files
     }
+    PREFETCH_DIR.mkdir(parents=True, exist_ok=True)
+    target = prefetch_file(task_id)
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text(json.dumps(context, default=str))
+    os.replace(tmp, target)
+
+    return {"success": True, "task_id": task_id, "files": len(files), "cache": str(target)}
+
+
+def start_prefetch(task_id: str, project_dir: Path) -> Optional[str]:
+    """Evict stale prefetches and prefetch task_id in a detached process."""
+    evict_prefetches()
+    if os.environ.get("DARTAI_NO_PREFETCH") or prefetch_file(task_id).exists():
+        return None
+    # Run the SLOP call in the child itself, never on the daemon's request loop
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "prefetch", task_id, str(project_dir)],
+        cwd=project_dir,
+        env={**os.environ, "DARTAI_NO_DAEMON": "1"},
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    return task_id
+
+
+def take_prefetch(task_id: str) -> Optional[dict]:
+    """Get and remove the prefetched context of a task, or None on a miss."""
+    path = prefetch_file(task_id)
+    try:
+        context = json.loads(path.read_text())
+        path.unlink()
+    except (OSError, json.JSONDecodeError):
+        return None
+    return context
+
+
+def evict_prefetches(max_age: int = PREFETCH_TTL) -> int:
+    """Remove prefetches older than max_age seconds; returns how many were removed."""
+    if not PREFETCH_DIR.exists():
+        return 0
+    cutoff = datetime.now().timestamp() - max_age
+    evicted = 0
+    for path in PREFETCH_DIR.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                evicted += 1
+        except OSError:
+            pass
+    return evicted
 
 
 def complete_task(task_id: str, success: bool, details: Optional[str] = None) -> dict:
-    """Mark a task as completed or failed."""
-    state = load_state()
+    """
+    Mark a task as completed or failed.
 
-    if success:
-        state["tasks_completed"] += 1
-    else:
-        state["tasks_failed"] += 1
-
-        # Check failure mode
-        if state["failure_mode"] == "stop":
-            state["running"] = False
-            state["history"].append({
-                "dartboard": state["dartboard"],
-                "started_at": state["started_at"],
-                "stopped_at": datetime.now().isoformat(),
-                "tasks_completed": state["tasks_completed"],
-                "tasks_failed": state["tasks_failed"],
-                "stop_reason": f"task_failure: {task_id}"
-            })
+    The task must be in flight, or requeued by the watchdog and finished
+    late by its executor. Completing a task again is a no-op.
+    """
+    with state_lock():
+        state = load_state()
 
-    state["current_task"] = None
-    state["last_activity"] = datetime.now().isoformat()
+        if task_id in state.get("finished", {}):
+            return {
+                "success": True,
+                "task_id": task_id,
+                "task_success": state["finished"][task_id],
+                "already_completed": True
+            }
 
-    save_state(state)
+        requeued = any(t["id"] == task_id for t in state.get("requeued", []))
+        if task_id not in state["in_flight"] and not requeued:
+            return {
+                "success": False,
+                "error": f"Task not in flight: {task_id}"
+            }
+
+        slot = state["in_flight"].get(task_id, {}).get("slot")
+        append_event(state, "complete_task", task_id=task_id, success=success, details=details)
 
     return {
         "success": True,
         "task_id": task_id,
         "task_success": success,
+        "slot": slot,
         "loop_running": state["running"],
+        "in_flight": len(state["in_flight"]),
         "details": details
     }
 
 
+def set_task_phase(task_id: str, phase: str) -> dict:
+    """Record that an in-flight task, or every task of a batch, entered a new phase."""
+    if phase not in TASK_PHASES:
+        return {
+            "success": False,
+            "error": f"Unknown phase: {phase}",
+            "phases": TASK_PHASES
+        }
+
+    with state_lock():
+        state = load_state()
+
+        members = batch_members(state, task_id)
+        if not members:
+            return {
+                "success": False,
+                "error": f"Task not in flight: {task_id}"
+            }
+
+        if phase == "verify" and members[0]["phase"] != "verify":
+            held = hold_back(state, task_id, "verify")
+            if held:
+                return held
+
+        append_event(state, "phase", task_id=task_id, phase=phase, lease_seconds=LEASE_SECONDS)
+
+    return {
+        "success": True,
+        "task_id": task_id,
+        "phase": phase
+    }
+
+
+def heartbeat(task_id: str, lease_seconds: int = LEASE_SECONDS) -> dict:
+    """Extend the lease of an in-flight task; executors call this while alive."""
+    with state_lock():
+        state = load_state()
+
+        members = batch_members(state, task_id)
+        if not members:
+            # The watchdog may already have requeued or failed the task
+            return {
+                "success": False,
+                "error": f"Task not in flight: {task_id}",
+                "requeued": any(t["id"] == task_id for t in state.get("requeued", []))
+            }
+
+        append_event(state, "heartbeat", task_id=task_id, lease_seconds=lease_seconds)
+
+    return {
+        "success": True,
+        "task_id": task_id,
+        "renewed": [t["id"] for t in members],
+        "lease_expires_at": members[0]["lease_expires_at"]
+    }
+
+
+def expired_leases(state: dict, now: Optional[datetime] = None) -> list:
+    """Get in-flight tasks whose lease has expired, oldest expiry first."""
+    now = (now or datetime.now()).isoformat()
+    return sorted(
+        (t for t in state["in_flight"].values() if t.get("lease_expires_at", now) < now),
+        key=lambda t: t["lease_expires_at"]
+    )
+
+
+def check_leases(now: Optional[datetime] = None) -> dict:
+    """
+    Requeue or fail every in-flight task whose lease has expired.
+
+    With failure_mode "stop" an expired lease fails the task and stops the
+    loop. Otherwise the slot is released and the task is requeued, until it
+    has expired LEASE_MAX_EXPIRIES times and is failed instead.
+    """
+    with state_lock():
+        state = load_state()
+        expired = []
+
+        for task in expired_leases(state, now):
+            previous = state.get("lease_expiries", {}).get(task["id"], 0)
+            if state["failure_mode"] == "stop" or previous + 1 >= LEASE_MAX_EXPIRIES:
+                action = "fail"
+            else:
+                action = "requeue"
+            append_event(state, "lease_expired", task_id=task["id"], action=action,
+                         slot=task["slot"], lease_expires_at=task["lease_expires_at"])
+            expired.append({"task_id": task["id"], "slot": task["slot"], "action": action})
+
+    return {
+        "success": True,
+        "expired": expired,
+        "requeued": state.get("requeued", []),
+        "loop_running": state["running"],
+        "in_flight": len(state["in_flight"])
+    }
+
+
+def watchdog_tick() -> Optional[dict]:
+    """
+    Check leases from an ordinary command when no daemon runs the watchdog.
+
+    At most once per WATCHDOG_INTERVAL, tracked by a stamp file's mtime.
+    The lock is only taken when a lease has actually expired.
+    """
+    if _resident is not None:
+        return None
+    try:
+        if time.time() - WATCHDOG_STAMP_FILE.stat().st_mtime < WATCHDOG_INTERVAL:
+            return None
+    except FileNotFoundError:
+        pass
+    ensure_state_dir()
+    WATCHDOG_STAMP_FILE.touch()
+    if not expired_leases(load_state()):
+        return None
+    return check_leases()
+
+
 def get_status() -> dict:
     """Get the current loop status."""
     state = load_state()
@@ -189,11 +1123,18 @@ def get_status() -> dict:
         "running": state["running"],
         "dartboard": state["dartboard"],
         "current_task": state["current_task"],
+        "slots": state["slots"],
+        "free_slots": state["slots"] - len({t["slot"] for t in state["in_flight"].values()}),
+        "in_flight": sorted(state["in_flight"].values(), key=lambda t: t["slot"]),
+        "expired_leases": [t["id"] for t in expired_leases(state)],
+        "requeued": state.get("requeued", []),
+        "lease_expiries": sum(state.get("lease_expiries", {}).values()),
         "tasks_completed": state["tasks_completed"],
         "tasks_failed": state["tasks_failed"],
         "started_at": state["started_at"],
         "last_activity": state["last_activity"],
-        "failure_mode": state.get("failure_mode", "stop")
+        "failure_mode": state.get("failure_mode", "stop"),
+        "governor": governor_status(state)
     }
 
     if state["running"] and state["started_at"]:
@@ -201,18 +1142,752 @@ def get_status() -> dict:
         duration = datetime.now() - started
         result["duration_seconds"] = int(duration.total_seconds())
         result["duration_human"] = str(duration).split(".")[0]
+        result.update(backlog_eta(state))
 
     return result
 
 
-def get_history() -> list:
-    """Get loop execution history."""
+def backlog_eta(state: dict, now: Optional[datetime] = None) -> dict:
+    """
+    Estimate when the known backlog will be finished.
+
+    Sums the estimated time left on in-flight tasks and the estimates of
+    queued tasks, spread evenly over the execution slots. The backlog is
+    whatever the last `schedule` call saw.
+    """
+    now = now or datetime.now()
+    remaining = 0.0
+    for task in state["in_flight"].values():
+        elapsed = (now - datetime.fromisoformat(task["started_at"])).total_seconds()
+        remaining += max(0.0, (task.get("estimated_seconds") or DEFAULT_TASK_SECONDS) - elapsed)
+
+    queued = [t for t in state.get("backlog", []) if t["id"] not in state["in_flight"]]
+    remaining += sum(t["estimated_seconds"] for t in queued)
+    eta_seconds = int(remaining / max(1, state["slots"]))
+
+    return {
+        "backlog_remaining": len(queued),
+        "eta_seconds": eta_seconds,
+        "eta_at": datetime.fromtimestamp(now.timestamp() + eta_seconds).isoformat(timespec="seconds")
+    }
+
+
+def task_dependencies(task: dict) -> list:
+    """Get the ids a task depends on from any of the known dependency fields."""
+    deps = []
+    for field in DEPENDENCY_FIELDS:
+        value = task.get(field)
+        if not value:
+            continue
+        for dep in value if isinstance(value, list) else [value]:
+            dep_id = dep.get("id") if isinstance(dep, dict) else dep
+            if dep_id:
+                deps.append(str(dep_id))
+    relationships = task.get("relationships") or {}
+    for field in ("blockedBy", "blocked_by"):
+        deps.extend(str(d.get("id") if isinstance(d, dict) else d) for d in relationships.get(field, []))
+    return deps
+
+
+def is_task_done(task: dict) -> bool:
+    """Check whether a task counts as done for its dependents."""
+    return bool(task.get("is_completed") or task.get("isCompleted")) or \
+        str(task.get("status", "")).lower() in DONE_STATUSES
+
+
+def task_tags(task: dict) -> list:
+    """Get a Dart task's tag names, lowercased."""
+    tags = task.get("tags") or []
+    return sorted({str(t.get("name") if isinstance(t, dict) else t).lower() for t in tags if t})
+
+
+def title_keywords(title: str) -> list:
+    """Get the distinct words of a title that can key a duration estimate."""
+    words = re.findall(r"[a-z][a-z0-9_-]{2,}", (title or "").lower())
+    return sorted(set(words) - ESTIMATE_STOPWORDS)
+
+
+def estimate_keys(title: str, tags: list, dartboard: Optional[str]) -> list:
+    """Get the estimate keys a task's duration counts toward."""
+    keys = ["*", f"board:{dartboard}"]
+    keys += [f"tag:{tag}" for tag in tags]
+    keys += [f"word:{word}" for word in title_keywords(title)]
+    return keys
+
+
+def learn_estimates(records: Optional[list] = None, state: Optional[dict] = None) -> dict:
+    """
+    Learn median task durations from successfully finished tasks.
+
+    Keys are "tag:<name>", "word:<keyword>", "board:<dartboard>" and "*"
+    for every task. Keys with fewer than ESTIMATE_MIN_SAMPLES tasks are
+    left out. A batched task counts as its batch's time divided by the
+    batch size. Without records, the samples the reducer keeps in the
+    state are used, so no event history is read.
+    """
+    if records is None:
+        samples = (state or load_state()).get("estimate_samples", {})
+    else:
+        samples = {}
+        for record in records:
+            if not record["success"]:
+                continue
+            for key in estimate_keys(record["title"], record["tags"], record["dartboard"]):
+                samples.setdefault(key, []).append(record["seconds"] / record.get("batch_size", 1))
+
+    return {
+        key: {"seconds": percentile(values, 50), "samples": len(values)}
+        for key, values in samples.items()
+        if len(values) >= ESTIMATE_MIN_SAMPLES
+    }
+
+
+def estimate_duration(title: str, tags: list, dartboard: Optional[str], estimates: dict) -> tuple:
+    """
+    Estimate a task's duration in seconds and say what the estimate is based on.
+
+    Uses the most specific evidence available: the median over matching
+    tags, else over matching title keywords, else the dartboard, else all
+    tasks, else DEFAULT_TASK_SECONDS.
+    """
+    tiers = [
+        ("tags", [f"tag:{tag}" for tag in tags]),
+        ("keywords", [f"word:{word}" for word in title_keywords(title)]),
+        ("dartboard", [f"board:{dartboard}"]),
+        ("all", ["*"])
+    ]
+    for basis, keys in tiers:
+        matched = [estimates[key]["seconds"] for key in keys if key in estimates]
+        if matched:
+            return round(percentile(matched, 50), 1), basis
+    return float(DEFAULT_TASK_SECONDS), "default"
+
+
+def schedule_tasks(tasks: list, policy: str = SCHEDULE_POLICIES[0]) -> dict:
+    """
+    Build a dependency DAG from a dartboard's task list and rank the ready set.
+
+    Dependencies on ids that are not in the list are treated as satisfied,
+    since list_tasks is normally filtered to incomplete tasks. Task weights
+    are duration estimates learned from finished tasks. Ready tasks are
+    ordered by policy:
+
+      critical-path  longest chain of work they unblock, then priority
+      sjf            shortest expected duration first, then priority
+      fifo           the order of the task list
+
+    Tasks already in flight are not ready. While the loop runs, the pending
+    tasks are recorded as its backlog for the status ETA.
+    """
+    if policy not in SCHEDULE_POLICIES:
+        return {"success": False, "error": f"Unknown policy: {policy}", "policies": SCHEDULE_POLICIES}
+
+    by_id = {str(t["id"]): t for t in tasks if t.get("id")}
+    pending = {task_id: t for task_id, t in by_id.items() if not is_task_done(t)}
+
+    deps = {
+        task_id: [d for d in task_dependencies(t) if d in pending and d != task_id]
+        for task_id, t in pending.items()
+    }
+    dependents = {task_id: [] for task_id in pending}
+    for task_id, task_deps in deps.items():
+        for dep in task_deps:
+            dependents[dep].append(task_id)
+
+    # Kahn's algorithm; whatever is never emitted sits on a cycle
+    indegree = {task_id: len(task_deps) for task_id, task_deps in deps.items()}
+    ready = [task_id for task_id, n in indegree.items() if n == 0]
+    order = []
+    while ready:
+        task_id = ready.pop()
+        order.append(task_id)
+        for dependent in dependents[task_id]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+    cyclic = sorted(set(pending) - set(order))
+
+    state = load_state()
+    estimates = learn_estimates(state=state)
+    expected = {}
+    for task_id, task in pending.items():
+        expected[task_id] = estimate_duration(task.get("title", ""), task_tags(task),
+                                              state["dartboard"], estimates)
+
+    # Longest weighted path from each task to the end of the DAG
+    critical = {}
+    for task_id in reversed(order):
+        downstream = [critical[d] for d in dependents[task_id] if d in critical]
+        critical[task_id] = expected[task_id][0] + max(downstream, default=0.0)
+
+    in_flight = set(state["in_flight"])
+    position = {task_id: i for i, task_id in enumerate(by_id)}
+
+    def rank(task_id):
+        priority = str(pending[task_id].get("priority", "")).lower()
+        priority_rank = PRIORITY_RANK.get(priority, len(PRIORITY_RANK))
+        if policy == "sjf":
+            return (expected[task_id][0], priority_rank, task_id)
+        if policy == "fifo":
+            return (position[task_id],)
+        return (-critical[task_id], priority_rank, task_id)
+
+    ready = []
+    blocked = []
+    for task_id in order:
+        status = str(pending[task_id].get("status", "")).lower()
+        if deps[task_id] or status == "blocked":
+            blocked.append({"id": task_id, "title": pending[task_id].get("title", ""),
+                            "waiting_on": deps[task_id], "status": pending[task_id].get("status")})
+        elif task_id not in in_flight and status not in NOT_READY_STATUSES:
+            ready.append(task_id)
+    ready.sort(key=rank)
+
+    # Follow the heaviest chain from the heaviest root
+    path = []
+    roots = [task_id for task_id in order if not deps[task_id]]
+    current = max(roots, key=lambda t: critical[t], default=None)
+    while current is not None:
+        path.append(current)
+        current = max(dependents[current], key=lambda t: critical.get(t, 0.0), default=None)
+
+    # Ranked ready tasks first, so the backlog head is what runs next
+    backlog = [{
+        "id": task_id,
+        "title": pending[task_id].get("title", ""),
+        "tags": task_tags(pending[task_id]),
+        "estimated_seconds": expected[task_id][0],
+        "ready": task_id in ready
+    } for task_id in ready + [t for t in order + cyclic if t not in ready]]
+    if state["running"] and backlog != state.get("backlog"):
+        with state_lock():
+            append_event(load_state(), "backlog", tasks=backlog)
+
+    return {
+        "policy": policy,
+        "ready": [{
+            "id": task_id,
+            "title": pending[task_id].get("title", ""),
+            "estimated_seconds": expected[task_id][0],
+            "estimate_basis": expected[task_id][1],
+            "critical_path_length": critical[task_id],
+            "unblocks": len(dependents[task_id])
+        } for task_id in ready],
+        "blocked": blocked,
+        "in_flight": sorted(in_flight & set(pending)),
+        "critical_path": path,
+        "critical_path_length": critical[path[0]] if path else 0.0,
+        "cycles": cyclic
+    }
+
+
+def read_task_list(source) -> list:
+    """Read a task list as a JSON array or a list_tasks response object."""
+    data = json.load(source)
+    if isinstance(data, dict):
+        for key in ("tasks", "items", "results"):
+            if isinstance(data.get(key), list):
+                return data[key]
+        return []
+    return data
+
+
+def iter_all_events():
+    """Yield every recorded event, oldest first, across segments and the log."""
+    if SEGMENTS_DIR.exists():
+        for segment in sorted(SEGMENTS_DIR.glob("events-*.log")):
+            yield from read_events(segment)
+    yield from read_events(EVENTS_FILE)
+
+
+def get_history(full: bool = False) -> list:
+    """
+    Get loop execution history.
+
+    The snapshot keeps the last HISTORY_LIMIT runs; with full=True the
+    complete history is rebuilt from every recorded event.
+    """
+    if not full:
+        return load_state().get("history", [])
+
+    state = initial_state()
+    for event in iter_all_events():
+        apply_event(state, event, history_limit=None)
+    return state["history"]
+
+
+def fold_phases(task: dict, ended: datetime):
+    """Add the running attempt of a task record, up to ended, to its totals."""
+    task["seconds"] += (ended - task["phases"][0][1]).total_seconds()
+    boundaries = task["phases"] + [(None, ended)]
+    for (phase, started), (_, until) in zip(boundaries, boundaries[1:]):
+        # Batch members share one executor, so each gets its share
+        seconds = max(0.0, (until - started).total_seconds()) / task["batch_size"]
+        task["phase_seconds"][phase] = task["phase_seconds"].get(phase, 0.0) + seconds
+    task["phases"] = []
+
+
+def task_records(events) -> list:
+    """
+    Rebuild one record per finished task from events.
+
+    Each record has the task's title, tags and dartboard, start/end
+    timestamps, success, total seconds and the seconds spent in each phase.
+    A batched task's phase seconds are its share of the batch's phases.
+    A task requeued by the watchdog is not finished: its next attempt
+    adds to the same record, and a late completion of the expired attempt
+    ends it. Seconds count only time spent in attempts, not in the queue.
+    """
+    open_tasks = {}
+    records = []
+    dartboard = None
+
+    for event in events:
+        event_type = event["type"]
+        ts = datetime.fromisoformat(event["ts"])
+
+        if event_type == "start":
+            dartboard = event["dartboard"]
+
+        elif event_type == "set_task":
+            task = open_tasks.get(event["task_id"])
+            if task is not None and task["requeued_at"] is not None:
+                # Retry of a requeued task; its expired attempt ran until the requeue
+                fold_phases(task, task["requeued_at"])
+                task["requeued_at"] = None
+                task["attempts"] += 1
+            else:
+                task = open_tasks[event["task_id"]] = {
+                    "start": ts,
+                    "seconds": 0.0,
+                    "phase_seconds": {},
+                    "requeued_at": None,
+                    "attempts": 1,
+                    "title": event.get("task_title", ""),
+                    "tags": event.get("tags", []),
+                    "dartboard": dartboard
+                }
+            task["phases"] = [("execute", ts)]
+            task["batch"] = event.get("batch")
+            task["batch_size"] = event.get("batch_size", 1)
+
+        elif event_type == "phase":
+            # A phase recorded under a batch id moves every open member
+            members = [open_tasks[event["task_id"]]] if event["task_id"] in open_tasks else \
+                [t for t in open_tasks.values() if t["batch"] and t["batch"] == event["task_id"]]
+            for task in members:
+                task["phases"].append((event["phase"], ts))
+
+        elif event_type == "lease_expired" and event.get("action") == "requeue" \
+                and event["task_id"] in open_tasks:
+            open_tasks[event["task_id"]]["requeued_at"] = ts
+
+        elif event_type in ("complete_task", "lease_expired") and event["task_id"] in open_tasks:
+            task = open_tasks.pop(event["task_id"])
+            fold_phases(task, ts)
+            records.append({
+                "task_id": event["task_id"],
+                "title": task["title"],
+                "tags": task["tags"],
+                "dartboard": task["dartboard"],
+                "batch_size": task["batch_size"],
+                "attempts": task["attempts"],
+                "start": task["start"],
+                "end": ts,
+                "success": event.get("success", False),
+                "seconds": task["seconds"],
+                "phase_seconds": task["phase_seconds"]
+            })
+
+        elif event_type == "stop":
+            open_tasks.clear()
+
+    return records
+
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values, or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def window_metrics(records: list, window_seconds: int, now: datetime) -> dict:
+    """Compute throughput, latency percentiles and failure rate over a window."""
+    recent = [r for r in records if (now - r["end"]).total_seconds() <= window_seconds]
+    latencies = [r["seconds"] for r in recent]
+    failed = sum(1 for r in recent if not r["success"])
+
+    phase_totals = {}
+    for record in recent:
+        for phase, seconds in record["phase_seconds"].items():
+            phase_totals[phase] = phase_totals.get(phase, 0.0) + seconds
+
+    return {
+        "tasks_finished": len(recent),
+        "tasks_failed": failed,
+        "throughput_per_hour": round(len(recent) / (window_seconds / 3600), 3),
+        "failure_rate": round(failed / len(recent), 3) if recent else 0.0,
+        "latency_seconds": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99)
+        },
+        "phase_seconds": {phase: round(seconds, 3) for phase, seconds in phase_totals.items()}
+    }
+
+
+def format_prometheus(metrics: dict) -> str:
+    """Render metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP dartai_loop_running Whether the dartai loop is running.",
+        "# TYPE dartai_loop_running gauge",
+        f"dartai_loop_running {int(metrics['running'])}",
+        "# HELP dartai_loop_in_flight_tasks Tasks currently holding an execution slot.",
+        "# TYPE dartai_loop_in_flight_tasks gauge",
+        f"dartai_loop_in_flight_tasks {metrics['in_flight']}",
+        "# HELP dartai_loop_tasks_total Finished task attempts by result.",
+        "# TYPE dartai_loop_tasks_total counter",
+        f'dartai_loop_tasks_total{{result="success"}} {metrics["totals"]["succeeded"]}',
+        f'dartai_loop_tasks_total{{result="failure"}} {metrics["totals"]["failed"]}',
+        "# HELP dartai_loop_throughput_tasks_per_hour Finished tasks per hour over the window.",
+        "# TYPE dartai_loop_throughput_tasks_per_hour gauge"
+    ]
+    windows = metrics["windows"]
+    for name, w in windows.items():
+        lines.append(f'dartai_loop_throughput_tasks_per_hour{{window="{name}"}} {w["throughput_per_hour"]}')
+
+    lines += [
+        "# HELP dartai_loop_failure_rate Fraction of finished tasks that failed over the window.",
+        "# TYPE dartai_loop_failure_rate gauge"
+    ]
+    for name, w in windows.items():
+        lines.append(f'dartai_loop_failure_rate{{window="{name}"}} {w["failure_rate"]}')
+
+    lines += [
+        "# HELP dartai_loop_task_latency_seconds Task latency quantiles over the window.",
+        "# TYPE dartai_loop_task_latency_seconds gauge"
+    ]
+    for name, w in windows.items():
+        for key, quantile in (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99")):
+            value = w["latency_seconds"][key]
+            if value is not None:
+                lines.append(
+                    f'dartai_loop_task_latency_seconds{{window="{name}",quantile="{quantile}"}} {value}'
+                )
+
+    lines += [
+        "# HELP dartai_loop_phase_seconds Time spent per phase over the window.",
+        "# TYPE dartai_loop_phase_seconds gauge"
+    ]
+    for name, w in windows.items():
+        for phase, seconds in w["phase_seconds"].items():
+            lines.append(f'dartai_loop_phase_seconds{{window="{name}",phase="{phase}"}} {seconds}')
+
+    return "\n".join(lines) + "\n"
+
+
+def get_metrics(textfile: Optional[Path] = None) -> dict:
+    """
+    Compute loop throughput and latency metrics from the event log.
+
+    Also writes them in Prometheus textfile format (atomically, as the
+    node_exporter textfile collector requires) to textfile or METRICS_FILE.
+    """
+    state = load_state()
+    records = task_records(iter_all_events())
+    now = datetime.now()
+
+    metrics = {
+        "running": state["running"],
+        "in_flight": len(state["in_flight"]),
+        "totals": {
+            "succeeded": sum(1 for r in records if r["success"]),
+            "failed": sum(1 for r in records if not r["success"])
+        },
+        "windows": {
+            name: window_metrics(records, seconds, now)
+            for name, seconds in METRICS_WINDOWS.items()
+        }
+    }
+
+    textfile = textfile or METRICS_FILE
+    textfile.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = textfile.with_suffix(".tmp")
+    tmp_path.write_text(format_prometheus(metrics))
+    os.replace(tmp_path, textfile)
+    metrics["textfile"] = str(textfile)
+
+    return metrics
+
+
+def persist_writes(writes: queue.Queue):
+    """
+    Daemon writer thread: append queued events and run compactions in order.
+
+    Queued events are written in batches so bursts of commands cost one
+    write; a None item drains the queue and stops the thread.
+    """
+    while True:
+        items = [writes.get()]
+        while True:
+            try:
+                items.append(writes.get_nowait())
+            except queue.Empty:
+                break
+
+        lines = []
+        for item in items:
+            if item is None:
+                break
+            kind, payload = item
+            if kind == "event":
+                lines.append(payload)
+            else:
+                if lines:
+                    with open(EVENTS_FILE, "a") as f:
+                        f.write("".join(lines))
+                    lines = []
+                compact_events(payload)
+
+        if lines:
+            with open(EVENTS_FILE, "a") as f:
+                f.write("".join(lines))
+
+        if None in items:
+            return
+
+
+def serve() -> dict:
+    """
+    Run the task runner daemon on SOCKET_FILE.
+
+    State stays in memory and the event log is written by a background
+    thread. Requests are handled one at a time, so commands are serialized
+    exactly as they are under the file lock. The daemon holds that lock, so
+    direct writers (DARTAI_NO_DAEMON=1) wait until it stops. Expired leases
+    are checked inline by the accept loop, which wakes at least every half
+    second, once WATCHDOG_INTERVAL seconds have passed since the last
+    check; a check due while a request is handled runs right after it.
+    Stops on a `shutdown` request or SIGINT/SIGTERM.
+    """
+    global _resident
+    import signal
+
+    ensure_state_dir()
+    if SOCKET_FILE.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(SOCKET_FILE))
+            return {"success": False, "error": "Daemon already running", "socket": str(SOCKET_FILE)}
+        except OSError:
+            SOCKET_FILE.unlink()  # stale socket from a dead daemon
+        finally:
+            probe.close()
+
+    lock_file = open(LOCK_FILE, "a")
+    if fcntl:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
     state = load_state()
-    return state.get("history", [])
+    writes = queue.Queue()
+    writer = threading.Thread(target=persist_writes, args=(writes,), daemon=True)
+    writer.start()
+    _resident = {"state": state, "writes": writes}
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(SOCKET_FILE))
+    os.chmod(SOCKET_FILE, 0o600)
+    server.listen(16)
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    server.settimeout(0.5)
+    requests = 0
+    next_watchdog = 0.0
+
+    try:
+        while not stopping.is_set():
+            if time.monotonic() >= next_watchdog:
+                check_leases()
+                next_watchdog = time.monotonic() + WATCHDOG_INTERVAL
+
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except KeyboardInterrupt:
+                break
+
+            with conn:
+                conn.settimeout(SOCKET_TIMEOUT)
+                try:
+                    request = json.loads(conn.makefile("r").readline())
+                    argv = request.get("argv", [])
+                    if argv[:1] == ["shutdown"]:
+                        result, exit_code = {"success": True, "message": "Daemon stopping"}, 0
+                        stopping.set()
+                    else:
+                        result, exit_code = dispatch(argv, request.get("stdin"), request.get("cwd"))
+                except Exception as e:
+                    result, exit_code = {"error": str(e)}, 1
+                requests += 1
+                try:
+                    conn.sendall((json.dumps({"result": result, "exit_code": exit_code},
+                                             default=str) + "\n").encode())
+                except OSError:
+                    pass
+    finally:
+        server.close()
+        if SOCKET_FILE.exists():
+            SOCKET_FILE.unlink()
+        writes.put(None)
+        writer.join()
+        _resident = None
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    return {"success": True, "message": "Daemon stopped", "requests_served": requests}
+
+
+def send_to_daemon(argv: list, stdin_text: Optional[str] = None) -> Optional[dict]:
+    """Send a command to the daemon; None when no daemon is listening."""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(SOCKET_TIMEOUT)
+    try:
+        client.connect(str(SOCKET_FILE))
+    except OSError:
+        client.close()
+        return None
+
+    with client:
+        request = {"argv": argv, "stdin": stdin_text, "cwd": os.getcwd()}
+        client.sendall((json.dumps(request) + "\n").encode())
+        return json.loads(client.makefile("r").readline())
+
+
+def dispatch(argv: list, stdin_text: Optional[str] = None, cwd: Optional[str] = None) -> tuple:
+    """Run one CLI command from the client's cwd and return (result, exit_code)."""
+    import io
+
+    command = argv[0]
+    sys_argv = ["task_runner.py", *argv]
+    stdin = io.StringIO(stdin_text) if stdin_text is not None else sys.stdin
+
+    if command in WATCHDOG_COMMANDS:
+        watchdog_tick()
+
+    if command == "start":
+        dartboard = sys_argv[2] if len(sys_argv) > 2 else None
+        failure_mode = sys_argv[3] if len(sys_argv) > 3 else "stop"
+        slots = int(sys_argv[4]) if len(sys_argv) > 4 else 1
+        if not dartboard:
+            return {"error": "Dartboard name required"}, 1
+        result = start_loop(dartboard, failure_mode, slots)
+
+    elif command == "stop":
+        reason = sys_argv[2] if len(sys_argv) > 2 else "user_request"
+        result = stop_loop(reason)
+
+    elif command == "status":
+        result = get_status()
+
+    elif command == "history":
+        result = get_history(full="--all" in sys_argv[2:])
+
+    elif command == "set-task":
+        task_id = sys_argv[2] if len(sys_argv) > 2 else None
+        task_title = sys_argv[3] if len(sys_argv) > 3 else ""
+        slot = int(sys_argv[4]) if len(sys_argv) > 4 else None
+        if not task_id:
+            return {"error": "Task ID required"}, 1
+        result = set_current_task(task_id, task_title, slot, Path(cwd or os.getcwd()))
+
+    elif command == "set-batch":
+        task_ids = [a for a in sys_argv[2:] if not a.startswith("--")]
+        slot = next((int(a.split("=", 1)[1]) for a in sys_argv[2:] if a.startswith("--slot=")), None)
+        if not task_ids:
+            return {"error": "Task IDs required"}, 1
+        result = set_batch(task_ids, slot, Path(cwd or os.getcwd()))
+
+    elif command == "batch":
+        args = [a for a in sys_argv[2:] if not a.startswith("--")]
+        policy = next((a.split("=", 1)[1] for a in sys_argv[2:] if a.startswith("--policy=")),
+                      SCHEDULE_POLICIES[0])
+        source = args[0] if args else "-"
+        if source == "-":
+            tasks = read_task_list(stdin)
+        else:
+            with open(source) as f:
+                tasks = read_task_list(f)
+        result = plan_batches(tasks, policy)
+
+    elif command == "complete-task":
+        task_id = sys_argv[2] if len(sys_argv) > 2 else None
+        success = sys_argv[3].lower() == "true" if len(sys_argv) > 3 else True
+        details = sys_argv[4] if len(sys_argv) > 4 else None
+        if not task_id:
+            return {"error": "Task ID required"}, 1
+        result = complete_task(task_id, success, details)
+
+    elif command == "phase":
+        task_id = sys_argv[2] if len(sys_argv) > 2 else None
+        phase = sys_argv[3] if len(sys_argv) > 3 else None
+        if not task_id or not phase:
+            return {"error": "Task ID and phase required", "phases": TASK_PHASES}, 1
+        result = set_task_phase(task_id, phase)
+
+    elif command == "heartbeat":
+        task_id = sys_argv[2] if len(sys_argv) > 2 else None
+        lease_seconds = int(sys_argv[3]) if len(sys_argv) > 3 else LEASE_SECONDS
+        if not task_id:
+            return {"error": "Task ID required"}, 1
+        result = heartbeat(task_id, lease_seconds)
+
+    elif command == "acquire":
+        count = float(sys_argv[2]) if len(sys_argv) > 2 else 1
+        result = acquire_tokens(count)
+
+    elif command == "watchdog":
+        result = check_leases()
+
+    elif command == "prefetch":
+        task_id = sys_argv[2] if len(sys_argv) > 2 else None
+        project_dir = Path(sys_argv[3]) if len(sys_argv) > 3 else Path(cwd or os.getcwd())
+        if not task_id:
+            return {"error": "Task ID required"}, 1
+        result = prefetch_task(task_id, project_dir.resolve())
+
+    elif command == "evict-prefetch":
+        result = {"success": True, "evicted": evict_prefetches(0 if "--all" in sys_argv[2:] else PREFETCH_TTL)}
+
+    elif command == "metrics":
+        textfile = Path(sys_argv[2]) if len(sys_argv) > 2 else None
+        result = get_metrics(textfile)
+
+    elif command == "schedule":
+        args = [a for a in sys_argv[2:] if not a.startswith("--")]
+        policy = next((a.split("=", 1)[1] for a in sys_argv[2:] if a.startswith("--policy=")),
+                      SCHEDULE_POLICIES[0])
+        source = args[0] if args else "-"
+        if source == "-":
+            tasks = read_task_list(stdin)
+        else:
+            with open(source) as f:
+                tasks = read_task_list(f)
+        result = schedule_tasks(tasks, policy)
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    return result, 0
 
 
 def main():
-    """CLI interface for task runner."""
+    """CLI interface for task runner; a thin client when the daemon is running."""
     if len(sys.argv) < 2:
         print(json.dumps({"error": "Usage: task_runner.py <command> [args]"}))
         sys.exit(1)
@@ -220,45 +1895,27 @@ def main():
     command = sys.argv[1]
 
     try:
-        if command == "start":
-            dartboard = sys.argv[2] if len(sys.argv) > 2 else None
-            failure_mode = sys.argv[3] if len(sys.argv) > 3 else "stop"
-            if not dartboard:
-                print(json.dumps({"error": "Dartboard name required"}))
-                sys.exit(1)
-            result = start_loop(dartboard, failure_mode)
-
-        elif command == "stop":
-            reason = sys.argv[2] if len(sys.argv) > 2 else "user_request"
-            result = stop_loop(reason)
-
-        elif command == "status":
-            result = get_status()
-
-        elif command == "history":
-            result = get_history()
-
-        elif command == "set-task":
-            task_id = sys.argv[2] if len(sys.argv) > 2 else None
-            task_title = sys.argv[3] if len(sys.argv) > 3 else ""
-            if not task_id:
-                print(json.dumps({"error": "Task ID required"}))
-                sys.exit(1)
-            result = set_current_task(task_id, task_title)
-
-        elif command == "complete-task":
-            task_id = sys.argv[2] if len(sys.argv) > 2 else None
-            success = sys.argv[3].lower() == "true" if len(sys.argv) > 3 else True
-            details = sys.argv[4] if len(sys.argv) > 4 else None
-            if not task_id:
-                print(json.dumps({"error": "Task ID required"}))
-                sys.exit(1)
-            result = complete_task(task_id, success, details)
+        if command == "serve":
+            result, exit_code = serve(), 0
+
+        elif SOCKET_FILE.exists() and not os.environ.get("DARTAI_NO_DAEMON"):
+            stdin_text = None
+            if command in ("schedule", "batch") and [a for a in sys.argv[2:] if not a.startswith("--")] in ([], ["-"]):
+                stdin_text = sys.stdin.read()
+            response = send_to_daemon(sys.argv[1:], stdin_text)
+            if response is not None:
+                result, exit_code = response["result"], response["exit_code"]
+            elif stdin_text is not None:
+                result, exit_code = dispatch(sys.argv[1:], stdin_text)
+            else:
+                result, exit_code = dispatch(sys.argv[1:])
 
         else:
-            result = {"error": f"Unknown command: {command}"}
+            result, exit_code = dispatch(sys.argv[1:])
 
         print(json.dumps(result, indent=2, default=str))
+        if exit_code:
+            sys.exit(exit_code)
 
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,26 @@
+import subprocess
+
+import git_access
+
+
+def make_repo(path):
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    (path / "old file.py").write_text("x = 1\n")
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-qm", "init"],
+                   cwd=path, check=True)
+    return git_access.GitRepo(path, path / ".git")
+
+
+def test_missing_path_with_space_returns_none(tmp_path):
+    repo = make_repo(tmp_path)
+    (tmp_path / "new file.py").write_text("y = 2\n")
+    subprocess.run(["git", "add", "new file.py"], cwd=tmp_path, check=True)
+    try:
+        assert repo.object_info("HEAD:new file.py") is None
+        assert repo.read_blob("HEAD:new file.py") is None
+        # The persistent processes stay usable after a missing reply
+        assert repo.read_blob("HEAD:old file.py") == b"x = 1\n"
+        assert repo.object_info("HEAD:old file.py")["type"] == "blob"
+    finally:
+        repo.close()
@@ -0,0 +1,104 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import project_config
+
+SCRIPTS_DIR = Path(project_config.__file__).resolve().parent
+NESTED = "---\nname: demo\nlimits:\n  slots: 2\n---\n\nNotes\n"
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(project_config, "CACHE_DIR", tmp_path / "cache")
+
+
+def test_yaml_fallback_parses_nested_frontmatter(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "dartai.local.md"
+    path.write_text(NESTED)
+
+    config = project_config.read_config(path)
+
+    assert config["frontmatter"] == {"name": "demo", "limits": {"slots": 2}}
+    assert "error" not in config
+
+
+def test_yaml_fallback_finds_site_packages_under_dash_s():
+    pytest.importorskip("yaml")
+    code = "import project_config; print(project_config.load_yaml('a: {b: 2}'))"
+    result = subprocess.run([sys.executable, "-S", "-c", code], cwd=SCRIPTS_DIR,
+                            capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "{'a': {'b': 2}}"
+
+
+def test_update_refuses_to_drop_unparsed_frontmatter(tmp_path, monkeypatch):
+    def missing_yaml(text):
+        raise ImportError("No module named 'yaml'")
+
+    monkeypatch.setattr(project_config, "load_yaml", missing_yaml)
+    path = tmp_path / "dartai.local.md"
+    path.write_text(NESTED)
+
+    config = project_config.read_config(path)
+    assert config["frontmatter"] == {}
+    assert "yaml" in config["error"]
+
+    with pytest.raises(project_config.FrontmatterError):
+        project_config.update_config(lambda fm: fm.update(last_dartboard="web"), path)
+    assert path.read_text() == NESTED
+
+
+PARITY_VALUES = [
+    "", "~", "null", "true", "False", "yes", "off", "0", "7", "-12", "+3", "0123", "00", "0x1F",
+    "0b101", "0o17", "1_000", "1e3", "1E-3", "1.0e3", "1.5e+3", "1.", ".5", "-.5", "3.14", "-0.0",
+    ".inf", "-.inf", ".nan", "12:30", "1:20:30.5", "2026-01-01", "2026-01-01T10:00:00",
+    "web", "Bench/Board", "hello world", "a #comment", "#comment", "x#y", "'quoted'", "'it''s'",
+    '"double"', '"tab\\there"', '"\\u00e9t\\u00e9"', "[1, 2]", '["a", "b"]', "{a: 1}", "- item",
+    "-dash", "?q", ":colon", "a:b", "http://example.com/x", "trailing:", "=", "<<", "*alias",
+    "&anchor x", "!tag x", "|", ">", "%x", "@x", "`x`", ",x", "é", "v1.2.3", "1.2.3",
+]
+
+
+@pytest.mark.parametrize("value", PARITY_VALUES)
+def test_flat_parser_matches_yaml(value):
+    yaml = pytest.importorskip("yaml")
+    text = f"key: {value}\n"
+    try:
+        expected = yaml.safe_load(text)
+    except yaml.YAMLError:
+        expected = None
+
+    try:
+        flat = project_config.parse_flat(text)
+    except project_config.NotFlat:
+        flat = None
+    if flat is not None:
+        assert flat == expected
+        assert repr(flat) == repr(expected)
+
+    if expected is not None:
+        assert project_config.parse_frontmatter(text) == expected
+
+
+@pytest.mark.parametrize("key", ["on", "yes", "null", "true", "Off"])
+def test_yaml_special_keys_go_through_yaml(key):
+    yaml = pytest.importorskip("yaml")
+    text = f"{key}: 1\n"
+    assert project_config.parse_frontmatter(text) == yaml.safe_load(text)
+
+
+@pytest.mark.parametrize("value", [
+    "web", "12:30", "0123", "1e3", "yes", "", " padded ", "a #b", "it's", "[x]",
+    1, -7, 0.5, 1e16, 1e-7, float("inf"), True, None, ["a", 1], {"a": {"b": 2}},
+])
+def test_formatted_values_read_back_the_same_both_ways(value):
+    yaml = pytest.importorskip("yaml")
+    text = project_config.dump_frontmatter({"key": value})
+
+    assert yaml.safe_load(text) == {"key": value}
+    assert project_config.parse_frontmatter(text) == {"key": value}
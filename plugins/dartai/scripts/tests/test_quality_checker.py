@@ -0,0 +1,51 @@
+import quality_checker
+
+
+def test_default_check_reuses_watch_lint_results(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'demo'\n")
+    lint = {"type": "linting", "passed": True, "checks": []}
+    quality_checker.publish_watch_results(
+        tmp_path, quality_checker.tree_fingerprint(tmp_path), ["lint"],
+        {"overall_passed": True, "results": [lint]}
+    )
+
+    ran = []
+
+    def fake_run_checks(project_path, project_info, checks=None, *args, **kwargs):
+        ran.append(checks)
+        return {"overall_passed": False, "results": [{"type": "testing", "passed": False, "checks": []}]}
+
+    monkeypatch.setattr(quality_checker, "run_checks", fake_run_checks)
+    results = quality_checker.check_quality(str(tmp_path))
+
+    assert ran == [["test"]]
+    assert [r["type"] for r in results["results"]] == ["linting", "testing"]
+    assert results["precomputed"]["checks"] == ["lint"]
+    assert results["overall_passed"] is False
+
+
+def test_watch_results_cover_all_checks(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'demo'\n")
+    quality_checker.publish_watch_results(
+        tmp_path, quality_checker.tree_fingerprint(tmp_path), ["lint", "test"],
+        {"overall_passed": True, "results": [{"type": "linting", "passed": True},
+                                             {"type": "testing", "passed": True}]}
+    )
+    monkeypatch.setattr(quality_checker, "run_checks", fail_if_run)
+
+    results = quality_checker.check_quality(str(tmp_path))
+
+    assert results["overall_passed"] is True
+    assert len(results["results"]) == 2
+
+
+def test_stale_watch_results_are_ignored(tmp_path):
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'demo'\n")
+    quality_checker.publish_watch_results(
+        tmp_path, "stale", ["lint"], {"overall_passed": True, "results": []}
+    )
+    assert quality_checker.load_watch_results(tmp_path, ["lint", "test"]) is None
+
+
+def fail_if_run(*args, **kwargs):
+    raise AssertionError("checks covered by the watcher were run again")
@@ -0,0 +1,52 @@
+import pytest
+
+import task_runner
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_runner, "STATE_FILE", tmp_path / "loop_state.json")
+    monkeypatch.setattr(task_runner, "EVENTS_FILE", tmp_path / "loop_events.log")
+    monkeypatch.setattr(task_runner, "SEGMENTS_DIR", tmp_path / "loop_events")
+    monkeypatch.setattr(task_runner, "LOCK_FILE", tmp_path / "loop_state.lock")
+
+
+def test_mixed_micro_tags_share_a_batch():
+    tasks = [
+        {"id": "t1", "title": "Fix typo in README", "tags": ["typo"], "dartboard": "web"},
+        {"id": "t2", "title": "Bump lint config", "tags": ["config"], "dartboard": "web"},
+        {"id": "t3", "title": "Document the flags", "tags": ["docs"], "dartboard": "web"},
+    ]
+
+    plan = task_runner.plan_batches(tasks, "fifo")
+
+    assert len(plan["batches"]) == 1
+    batch = plan["batches"][0]
+    assert [t["id"] for t in batch["tasks"]] == ["t1", "t2", "t3"]
+    assert batch["kinds"] == ["config", "docs", "typo"]
+    assert plan["singles"] == []
+
+
+def test_batches_do_not_cross_dartboards():
+    tasks = [
+        {"id": "t1", "title": "Fix typo", "tags": ["typo"], "dartboard": "web"},
+        {"id": "t2", "title": "Tweak config", "tags": ["config"], "dartboard": "api"},
+    ]
+
+    plan = task_runner.plan_batches(tasks, "fifo")
+
+    assert plan["batches"] == []
+    assert plan["singles"] == ["t1", "t2"]
+
+
+def test_batches_are_capped_by_size_and_estimate():
+    tasks = [{"id": f"t{i}", "title": f"Typo {i}", "tags": ["typo"]} for i in range(7)]
+
+    plan = task_runner.plan_batches(tasks, "fifo")
+
+    for batch in plan["batches"]:
+        assert len(batch["tasks"]) <= task_runner.BATCH_MAX_TASKS
+        assert batch["estimated_seconds"] <= task_runner.BATCH_MAX_SECONDS
+    batched = [t["id"] for b in plan["batches"] for t in b["tasks"]]
+    assert sorted(batched + plan["singles"]) == sorted(t["id"] for t in tasks)
+    assert len(plan["batches"]) == 2
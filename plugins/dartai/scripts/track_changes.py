@@ -10,10 +10,9 @@ import json
 import os
 import sys
 from datetime import datetime
-from pathlib import Path
 
-STATE_DIR = Path.home() / ".dartai"
-CHANGES_FILE = STATE_DIR / "tracked_changes.json"
+import change_journal
+import event_store
 
 
 def track_change():
@@ -28,38 +27,25 @@ def track_change():
         except:
             pass
 
-    # Ensure state directory exists
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Load existing changes
-    changes = {"changes": []}
-    if CHANGES_FILE.exists():
-        try:
-            with open(CHANGES_FILE) as f:
-                changes = json.load(f)
-        except:
-            pass
-
-    # Add new change
     change_entry = {
         "timestamp": datetime.now().isoformat(),
         "working_dir": os.getcwd(),
-        "info": change_info
+        "task_id": event_store.current_task_id(),
+        "info": change_journal.compact(change_info)
     }
 
-    changes["changes"].append(change_entry)
-
-    # Keep only last 100 changes
-    changes["changes"] = changes["changes"][-100:]
+    change_journal.append(change_entry)
 
-    # Save changes
-    with open(CHANGES_FILE, "w") as f:
-        json.dump(changes, f, indent=2)
+    event_store.insert(
+        "changes", ts=change_entry["timestamp"], task_id=change_entry["task_id"],
+        tool=change_info.get("tool_name"),
+        path=event_store.find_value(change_info.get("tool_input", {}), ("file_path", "path")),
+        working_dir=change_entry["working_dir"]
+    )
 
     return {
         "success": True,
-        "tracked": True,
-        "total_changes": len(changes["changes"])
+        "tracked": True
     }
 
 
@@ -10,46 +10,8 @@ import json
 import os
 import sys
 from datetime import datetime
-from pathlib import Path
 
-CONFIG_DIR = Path(".claude")
-CONFIG_FILE = CONFIG_DIR / "dartai.local.md"
-
-
-def parse_config():
-    """Parse the dartai config file, extracting YAML frontmatter."""
-    if not CONFIG_FILE.exists():
-        return {"frontmatter": {}, "content": ""}
-
-    text = CONFIG_FILE.read_text()
-
-    if text.startswith("---"):
-        parts = text.split("---", 2)
-        if len(parts) >= 3:
-            try:
-                import yaml
-                frontmatter = yaml.safe_load(parts[1]) or {}
-            except Exception:
-                frontmatter = {}
-            content = parts[2].strip()
-            return {"frontmatter": frontmatter, "content": content}
-
-    return {"frontmatter": {}, "content": text}
-
-
-def write_config(frontmatter: dict, content: str = ""):
-    """Write config with YAML frontmatter."""
-    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-
-    try:
-        import yaml
-        yaml_content = yaml.dump(frontmatter, default_flow_style=False, sort_keys=False)
-    except ImportError:
-        # Fallback to simple format if yaml not available
-        yaml_content = "\n".join(f"{k}: {v}" for k, v in frontmatter.items())
-
-    output = f"---\n{yaml_content}---\n\n{content}"
-    CONFIG_FILE.write_text(output)
+from project_config import update_config
 
 
 def save_dartboard(dartboard: str):
@@ -57,13 +19,11 @@ def save_dartboard(dartboard: str):
     if not dartboard:
         return
 
-    config = parse_config()
-    fm = config["frontmatter"]
-
-    fm["last_dartboard"] = dartboard
-    fm["last_dartboard_used_at"] = datetime.now().isoformat()
+    def mutate(fm):
+        fm["last_dartboard"] = dartboard
+        fm["last_dartboard_used_at"] = datetime.now().isoformat()
 
-    write_config(fm, config["content"])
+    update_config(mutate)
     return {"saved": True, "dartboard": dartboard}
 
 
@@ -12,6 +12,9 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+import event_store
+from state_store import increment
+
 # Loop state file (written by subagent before termination)
 LOOP_FILE = Path(".claude/dartai-loop-state.json")
 
@@ -43,10 +46,11 @@ def track_iteration():
             }))
             return
 
-    # Increment iteration count
-    loop["iterations"] = loop.get("iterations", 0) + 1
-    loop["last_iteration_at"] = datetime.now().isoformat()
-    loop["last_subagent"] = os.environ.get("CLAUDE_SUBAGENT_ID", "unknown")
+    # Increment iteration count; the subagent's task results are kept
+    loop = increment(LOOP_FILE, "iterations", fields={
+        "last_iteration_at": datetime.now().isoformat(),
+        "last_subagent": os.environ.get("CLAUDE_SUBAGENT_ID", "unknown")
+    })
 
     # Get the most recent task result (written by subagent)
     tasks = loop.get("tasks", [])
@@ -67,10 +71,11 @@ def track_iteration():
         status = "unknown"
         message = "Iteration tracked. Waiting for task result."
 
-    # Write updated loop file
-    LOOP_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(LOOP_FILE, "w") as f:
-        json.dump(loop, f, indent=2)
+    event_store.insert(
+        "iterations", iteration=loop["iterations"], status=status if tasks else None,
+        task_id=tasks[-1].get("task_id") if tasks else None,
+        subagent=loop["last_subagent"], working_dir=os.getcwd()
+    )
 
     return {
         "success": True,
@@ -11,6 +11,9 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+import event_store
+from state_store import increment
+
 STATE_DIR = Path.home() / ".dartai"
 LOOP_FILE = Path(".claude/dartai-loop-state.json")
 
@@ -20,18 +23,9 @@ def track_spawn():
     # Ensure state directory exists
     STATE_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Load current loop state
-    loop = {"iterations": 0, "spawns": 0, "started_at": None}
-    if LOOP_FILE.exists():
-        try:
-            with open(LOOP_FILE) as f:
-                loop = json.load(f)
-        except Exception:
-            pass
-
     # Increment spawn count
-    loop["spawns"] = loop.get("spawns", 0) + 1
-    loop["last_spawn_at"] = datetime.now().isoformat()
+    spawned_at = datetime.now().isoformat()
+    loop = increment(LOOP_FILE, "spawns", fields={"last_spawn_at": spawned_at})
 
     # Get subagent type if available
     subagent_type = os.environ.get("CLAUDE_SUBAGENT_TYPE", "unknown")
@@ -39,12 +33,10 @@ def track_spawn():
     # Track spawn in log for audit trail
     spawn_log = STATE_DIR / "spawns.log"
     with open(spawn_log, "a") as f:
-        f.write(f"{datetime.now().isoformat()} - Spawn #{loop['spawns']}: {subagent_type}\n")
+        f.write(f"{spawned_at} - Spawn #{loop['spawns']}: {subagent_type}\n")
 
-    # Update loop file
-    LOOP_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(LOOP_FILE, "w") as f:
-        json.dump(loop, f, indent=2)
+    event_store.insert("spawns", ts=spawned_at, subagent_type=subagent_type, spawn_number=loop["spawns"],
+                       working_dir=os.getcwd())
 
     return {
         "success": True,
@@ -6,29 +6,19 @@ Tracks verification count only - results are in Dart task comments.
 """
 
 import json
-import os
 from datetime import datetime
 from pathlib import Path
 
+from state_store import increment
+
 LOOP_FILE = Path(".claude/dartai-loop.json")
 
 
 def track_verification():
     """Track verification count. Results are in Dart task comments."""
-    loop = {}
-    if LOOP_FILE.exists():
-        try:
-            with open(LOOP_FILE) as f:
-                loop = json.load(f)
-        except Exception:
-            pass
-
-    loop["verifications"] = loop.get("verifications", 0) + 1
-    loop["last_verification_at"] = datetime.now().isoformat()
-
-    LOOP_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(LOOP_FILE, "w") as f:
-        json.dump(loop, f, indent=2)
+    loop = increment(LOOP_FILE, "verifications", fields={
+        "last_verification_at": datetime.now().isoformat()
+    })
 
     return {
         "success": True,